@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authenticator'
+
+    def ready(self):
+        # Connects the receivers bumping the data versions
+        from authenticator import signals
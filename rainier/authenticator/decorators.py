@@ -0,0 +1,55 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ObjectDoesNotExist
+from django.shortcuts import redirect
+
+from authenticator.models import Profile
+
+
+def profile_required(view):
+    """
+    Restricts the view to logged-in users who completed the initial
+    configuration step and attaches their profile (along with its
+    currency) to the request, fetched with a single query. Async views
+    get an async wrapper, looking the user & profile up in a thread.
+    """
+    if asyncio.iscoroutinefunction(view):
+        return async_profile_required(view)
+
+    @login_required
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # Prevents the user from skipping the initial configuration step.
+        try:
+            request.profile = Profile.objects.select_related('currency').get(user=request.user)
+        except ObjectDoesNotExist:
+            return redirect('/configure')
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_profile_required(view):
+    """Restricts the async view like profile_required()."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await sync_to_async(is_authenticated)(request):
+            return redirect_to_login(request.get_full_path())
+        # Prevents the user from skipping the initial configuration step.
+        try:
+            request.profile = await sync_to_async(Profile.objects.select_related('currency').get)(user=request.user)
+        except ObjectDoesNotExist:
+            return redirect('/configure')
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def is_authenticated(request):
+    """Checks if a user is logged in, loading them from the session."""
+    return request.user.is_authenticated
@@ -3,7 +3,8 @@ from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.contrib.auth.models import User
 
 from authenticator.models import Profile
-from budgeter.models import Currency
+from budgeter.cache import get_reference
+from budgeter.forms import ReferenceChoiceField
 
 
 class SignUpForm(UserCreationForm):
@@ -36,7 +37,11 @@ class UserForm(UserChangeForm):
 
 
 class ProfileForm(forms.ModelForm):
-    currency = forms.ModelChoiceField(queryset=Currency.objects.all(), empty_label="Pick your prefered currency...", widget=forms.Select(attrs = {"class" : "form-select"}))
+    currency = ReferenceChoiceField(empty_label="Pick your prefered currency...", widget=forms.Select(attrs = {"class" : "form-select"}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['currency'].objects = get_reference().currencies
 
     class Meta:
         model = Profile
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from django.contrib.auth.models import User
 
@@ -9,9 +10,15 @@ from budgeter.models import Currency
 class Profile(models.Model):
     """
     Adds custom fields to the parent user class.
+
+    The data version & its modification time are bumped on any change of
+    the user's transactions or profile (see authenticator/versions.py) and
+    back the conditional GETs of the dashboard.
     """
     user = models.OneToOneField(User, null=True, on_delete=models.CASCADE)
     currency = models.ForeignKey(Currency, null=True, on_delete=models.CASCADE)
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+    data_modified = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.user}"
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from authenticator import versions
+from authenticator.models import Profile
+
+
+# Bumps the data version of the user on any change of their profile
+
+@receiver(post_save, sender=Profile)
+def bump_data_version(sender, instance, created, **kwargs):
+    """Marks the data of the profile's user as changed, e.g. after a change of currency."""
+    if not created and instance.user_id is not None:
+        versions.bump([instance.user_id])
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.db.models import F
+from django.middleware.csrf import get_token
+from django.utils import timezone
+
+from authenticator.models import Profile
+
+# Per-user data version
+#
+# Pages built from the user's data only (e.g. the dashboard) are answered
+# with a 304 when the client's copy is current, before running any query
+# beyond the profile lookup. The version is bumped with an UPDATE rather than
+# through the model, so that concurrent writes never lose an increment. The
+# version also keys the cached statistics of the dashboard (see wallet/stats.py).
+
+
+def bump(users=None):
+    """Marks the data of the given users (all of them by default) as changed."""
+    profiles = Profile.objects.all()
+    if users is not None:
+        profiles = profiles.filter(user__in=users)
+    profiles.update(data_version=F('data_version') + 1, data_modified=timezone.now())
+
+
+def get_version(profile):
+    """
+    Returns the data version of the profile's user. The modification time
+    tells apart the versions reset by a concurrent save of the profile.
+    """
+    return f"{profile.data_version}.{profile.data_modified.timestamp():.6f}"
+
+
+def get_etag(request, *parts):
+    """
+    Returns the entity tag of a page built from the current user's data,
+    as of their data version, along with the given version parts.
+    """
+    profile = request.profile
+    # Pages embedding a CSRF token change whenever the token is rotated. The
+    # secret is set up front when the client has none yet, so that the first
+    # page is tagged with the secret it embeds.
+    get_token(request)
+    secret = request.META.get('CSRF_COOKIE', "")
+    parts = (profile.user_id, get_version(profile), secret, *parts)
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
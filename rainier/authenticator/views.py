@@ -1,10 +1,10 @@
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import redirect, render
 from django.views import View
 
+from authenticator.decorators import profile_required
 from authenticator.forms import LoginForm, ProfileForm, SignUpForm, UserForm
 from authenticator.models import Profile
 
@@ -23,37 +23,31 @@ class Utilities(View):
         """Displays the initial settings configuration page and form."""
 
         # Prevents the user from revisiting the initial configuration page
-        try:
-            if Profile.objects.get(user=request.user.id):
+        if Profile.objects.filter(user=request.user).exists():
+            return redirect('.')
+
+        if request.method == "POST":
+            form = ProfileForm(request.POST)
+            if form.is_valid():
+                obj = form.save(commit=False)
+                obj.user = request.user
+                obj.save()
                 return redirect('.')
-        except ObjectDoesNotExist:
-            if request.method == "POST":
-                form = ProfileForm(request.POST)
-                if form.is_valid():
-                    obj = form.save(commit=False)
-                    obj.user = User.objects.get(pk=request.user.id)
-                    obj.save()
-                    return redirect('.')
-            else:
-                form = ProfileForm()
+        else:
+            form = ProfileForm()
 
         context = {"form": form}
 
         return render(request, "configure.html", context)
 
 
-    @login_required
+    @profile_required
     def account(request):
         """Displays the account management page and form."""
 
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
-
-        user = User.objects.get(pk=request.user.id)
+        # A copy of the user, as validating the form overwrites its instance,
+        # which would leave request.user with the rejected values
+        user = User.objects.get(pk=request.user.pk)
         form = UserForm(instance=user)
         if request.method == "POST":
             form = UserForm(request.POST, instance=user)
@@ -67,22 +61,13 @@ class Utilities(View):
         return render(request, "account.html", context)
 
 
-    @login_required
+    @profile_required
     def preferences(request):
         """Displays the preferences page and form."""
 
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
-
-        user = User.objects.get(pk=request.user.id)
-        profile = Profile.objects.get(user=user)
-        form = ProfileForm(instance=profile)
+        form = ProfileForm(instance=request.profile)
         if request.method == "POST":
-            form = ProfileForm(request.POST, instance=profile)
+            form = ProfileForm(request.POST, instance=request.profile)
             if form.is_valid():
                 obj = form.save(commit=False)
                 obj.save()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BudgeterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budgeter'
+
+    def ready(self):
+        # Connects the receivers invalidating the reference data cache
+        from budgeter import signals
@@ -0,0 +1,87 @@
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from budgeter.models import Category, Currency, Type
+from monitor.metrics import count_cache
+
+# Shared cache key of the reference data version, changed on every write
+# so that each worker process reloads its own copy. The version is stored
+# along with the time of the write, used by the conditional GETs.
+VERSION_KEY = 'budgeter:reference:version'
+
+# Reference data loaded by the current process & its version
+loaded = None
+loaded_version = None
+
+
+class ReferenceData:
+    """
+    Represents an in-memory copy of the types, categories and currencies,
+    indexed by primary key and by case-insensitive name.
+    """
+
+    def __init__(self):
+        self.types = list(Type.objects.order_by('name'))
+        self.categories = list(Category.objects.order_by('name'))
+        self.currencies = list(Currency.objects.order_by('name'))
+
+        self.types_by_id = {item.pk: item for item in self.types}
+        self.categories_by_id = {item.pk: item for item in self.categories}
+        self.currencies_by_id = {item.pk: item for item in self.currencies}
+        self.types_by_name = {item.name.lower(): item for item in self.types}
+        self.categories_by_name = {item.name.lower(): item for item in self.categories}
+
+        # Labels of the types & categories, as displayed next to each entry
+        self.type_labels = {item.pk: str(item) for item in self.types}
+        self.category_labels = {item.pk: str(item) for item in self.categories}
+
+        # Attaches the cached types so that no lazy lookups are needed
+        for category in self.categories:
+            category.type = self.types_by_id[category.type_id]
+
+    def find_type(self, name):
+        """Returns the type matching the name, regardless of its case."""
+        return self.types_by_name.get(name.lower())
+
+    def find_category(self, name):
+        """Returns the category matching the name, regardless of its case."""
+        return self.categories_by_name.get(name.lower())
+
+    def categories_for(self, type_id):
+        """Returns the categories of the given type, ordered by name."""
+        try:
+            type_id = int(type_id)
+        except (ValueError, TypeError):
+            return []
+        return [category for category in self.categories if category.type_id == type_id]
+
+
+def new_version():
+    """Returns a new version of the reference data, along with the current time."""
+    return uuid.uuid4().hex, timezone.now()
+
+
+def get_version():
+    """Returns the current version of the reference data & the time it was set."""
+    return cache.get_or_set(VERSION_KEY, new_version, None)
+
+
+def get_reference():
+    """Returns the reference data, reloading it if it changed since it was loaded."""
+    global loaded, loaded_version
+    version = get_version()
+    hit = loaded is not None and version == loaded_version
+    if not hit:
+        loaded = ReferenceData()
+        loaded_version = version
+    count_cache("reference", hit)
+    return loaded
+
+
+def invalidate(**kwargs):
+    """Discards the reference data of every process."""
+    global loaded
+    loaded = None
+    cache.set(VERSION_KEY, new_version(), None)
@@ -0,0 +1,47 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+
+class ReferenceChoiceField(forms.ChoiceField):
+    """
+    Represents a choice between reference data instances (see budgeter/cache.py).
+
+    Works like a ModelChoiceField, but the choices are rendered and the
+    submitted value is resolved from the cached instances, without queries.
+    """
+
+    def __init__(self, *, empty_label=None, **kwargs):
+        self.empty_label = empty_label
+        super().__init__(**kwargs)
+        self.objects = []
+
+    @property
+    def objects(self):
+        return self._objects
+
+    @objects.setter
+    def objects(self, objects):
+        self._objects = list(objects)
+        self.lookup = {str(item.pk): item for item in self._objects}
+        self.choices = [("", self.empty_label)] + [(item.pk, str(item)) for item in self._objects]
+
+    def prepare_value(self, value):
+        return getattr(value, 'pk', value)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.lookup[str(self.prepare_value(value))]
+        except KeyError:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+    def validate(self, value):
+        forms.Field.validate(self, value)
+
+    def has_changed(self, initial, data):
+        if self.disabled:
+            return False
+        initial = self.prepare_value(initial)
+        data = self.prepare_value(data)
+        return str(initial if initial is not None else "") != str(data if data is not None else "")
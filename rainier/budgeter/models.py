@@ -19,7 +19,8 @@ class Currency(models.Model):
 
     def CurrencyList(self):
         """Retrieves the available currency types."""
-        return self.objects.all().order_by('name')
+        from budgeter.cache import get_reference
+        return get_reference().currencies
 
     class Meta:
         verbose_name = 'Currency'
@@ -37,7 +38,8 @@ class Type(models.Model):
 
     def TypeList(self):
         """Retrieves the available transaction types."""
-        return self.objects.all().order_by('name')
+        from budgeter.cache import get_reference
+        return get_reference().types
 
     class Meta:
         verbose_name = 'Type'
@@ -58,8 +60,10 @@ class Category(models.Model):
 
     def CategoryList(self):
         """Retrieves the available transaction categories."""
-        categories_expenses = self.objects.filter(type="1").order_by('name')
-        categories_income = self.objects.filter(type="2").order_by('name')
+        from budgeter.cache import get_reference
+        reference = get_reference()
+        categories_expenses = reference.categories_for(1)
+        categories_income = reference.categories_for(2)
         return categories_expenses, categories_income
 
     def CategoryType(self):
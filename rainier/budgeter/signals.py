@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from budgeter import cache
+from budgeter.models import Category, Currency, Type
+
+
+# Invalidates the reference data cache on any change, including admin edits
+
+@receiver(post_save, sender=Type)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Type)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Currency)
+def invalidate_reference(sender, **kwargs):
+    """Discards the cached reference data after a write."""
+    cache.invalidate()
@@ -0,0 +1,45 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.utils.html import format_html
+
+from monitor.models import RequestProfile
+
+# Register your models here.
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('request_id', 'created', 'method', 'path', 'user', 'status', 'duration_ms', 'query_count', 'trigger')
+    list_filter = ('trigger', 'view', 'status')
+    search_fields = ('request_id', 'path', 'user__username')
+    fields = ('request_id', 'created', 'user', 'method', 'path', 'view', 'status', 'trigger', 'duration_ms', 'query_count', 'sql_time_ms', 'formatted_statistics', 'formatted_sql_trace')
+    readonly_fields = fields
+    actions = ('download',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Duration (ms)", ordering='duration')
+    def duration_ms(self, obj):
+        return f"{obj.duration * 1000:.1f}"
+
+    @admin.display(description="SQL time (ms)", ordering='sql_time')
+    def sql_time_ms(self, obj):
+        return f"{obj.sql_time * 1000:.1f}"
+
+    @admin.display(description="Statistics")
+    def formatted_statistics(self, obj):
+        return format_html("<pre>{}</pre>", obj.statistics)
+
+    @admin.display(description="SQL trace")
+    def formatted_sql_trace(self, obj):
+        return format_html("<pre>{}</pre>", obj.sql_trace)
+
+    @admin.action(description="Download the selected profile (.prof, for pstats or snakeviz)")
+    def download(self, request, queryset):
+        profile = queryset.first()
+        response = HttpResponse(bytes(profile.data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{profile.request_id}.prof"'
+        return response
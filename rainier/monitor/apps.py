@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MonitorConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitor'
+
+    def ready(self):
+        # Connects the receivers counting the transactions written
+        from monitor import signals
@@ -0,0 +1,100 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import Template
+
+# Metrics of the request being processed by the current thread or task
+current_metrics = ContextVar('current_metrics', default=None)
+
+# Max. length of the SQL of a query written to the logs, as the queries over
+# many ids (e.g. the IN lists of the bulk writes) run to several kilobytes
+SQL_LENGTH = 500
+
+
+class RequestMetrics:
+    """
+    Holds the measurements of a single request: wall time, SQL queries
+    (along with their own durations), template rendering time and
+    response size. Times are in seconds.
+    """
+    __slots__ = ('start', 'duration', 'queries', 'template_time', 'size', 'view')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = 0
+        # Appended to by every thread running the request's queries
+        self.queries = []
+        self.template_time = 0
+        self.size = None
+        self.view = None
+
+    def stop(self):
+        """Records the wall time of the request."""
+        self.duration = time.perf_counter() - self.start
+
+    @property
+    def sql_time(self):
+        """Returns the total time of the SQL queries."""
+        return sum(duration for duration, sql in self.queries)
+
+    def slowest_queries(self, count):
+        """Returns the given no. of slowest queries, as (duration, SQL) pairs."""
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:count]
+
+
+def truncate_sql(sql, length=SQL_LENGTH):
+    """Truncates the SQL of a query to the given length, marking the cut."""
+    return sql if len(sql) <= length else f"{sql[:length]}..."
+
+
+class QueryRecorder:
+    """Records the duration of every SQL query run while it is installed as an execute wrapper."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.queries.append((time.perf_counter() - start, sql))
+
+
+@contextmanager
+def record_queries(metrics):
+    """Records the queries run on the current thread's connections into the metrics, if any."""
+    with ExitStack() as stack:
+        if metrics is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(QueryRecorder(metrics)))
+        yield
+
+
+# Times the template rendering
+#
+# The views render their templates before returning (e.g. with render()), so
+# the rendering time is measured by wrapping the render() method of the
+# Django template backend, once, when the instrumentation is enabled. The
+# templates included by a template are rendered within its own render().
+
+def install_template_timer():
+    """Wraps the rendering of the templates to add its time to the current request's metrics."""
+    if getattr(Template.render, 'timed', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+    timed_render.timed = True
+    Template.render = timed_render
@@ -0,0 +1,50 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# Aggregated metrics
+#
+# Each worker process aggregates its own metrics in memory, every update
+# costing an uncontended lock per value. When running several workers (e.g.
+# gunicorn), point the PROMETHEUS_MULTIPROC_DIR environment variable to an
+# empty directory shared by the workers, and emptied on every restart: the
+# values are then kept in memory-mapped files and summed up on every scrape.
+
+# Buckets of the request latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Buckets of the no. of SQL queries per request
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_LATENCY = Histogram('rainier_request_duration_seconds', "Latency of the requests, per route.", ['route', 'method'], buckets=LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram('rainier_request_queries', "No. of SQL queries per request, per route.", ['route', 'method'], buckets=QUERY_BUCKETS)
+CACHE_REQUESTS = Counter('rainier_cache_requests', "Lookups of the caches, per cache & result (hit or miss).", ['cache', 'result'])
+TRANSACTIONS = Counter('rainier_transactions', "Transactions written, per action (created, edited, deleted or imported).", ['action'])
+
+
+def observe_request(request, metrics):
+    """Adds the measurements of a request to the route's histograms."""
+    match = request.resolver_match
+    route = f"/{match.route}" if match is not None else "unmatched"
+    REQUEST_LATENCY.labels(route, request.method).observe(metrics.duration)
+    REQUEST_QUERIES.labels(route, request.method).observe(len(metrics.queries))
+
+
+def count_cache(cache, hit):
+    """Counts a lookup of one of the caches."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def count_transactions(action, count=1):
+    """Counts the transactions written by an action."""
+    TRANSACTIONS.labels(action).inc(count)
+
+
+def export():
+    """Returns the metrics in the Prometheus text format, along with their content type."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,108 @@
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from monitor.instrumentation import RequestMetrics, current_metrics, install_template_timer, record_queries, truncate_sql
+from monitor.metrics import observe_request
+
+logger = logging.getLogger('monitor')
+
+
+class InstrumentationMiddleware:
+    """
+    Measures every request: wall time, SQL query count & time, template
+    rendering time and response size. Logs the requests slower than
+    MONITOR_SLOW_REQUEST (in seconds) along with their slowest queries,
+    truncated to SQL_LENGTH characters, and adds a Server-Timing header
+    when MONITOR_SERVER_TIMING is set.
+    The figures are aggregated in the /metrics histograms as well.
+
+    The middleware removes itself from the stack when MONITOR_ENABLED is
+    false, so that a disabled instrumentation costs nothing per request.
+    It runs natively under both WSGI & ASGI, so that the async views are
+    never adapted to sync ones to go through it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MONITOR_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_request = getattr(settings, 'MONITOR_SLOW_REQUEST', 0.5)
+        self.slowest_queries = getattr(settings, 'MONITOR_SLOWEST_QUERIES', 5)
+        self.server_timing = getattr(settings, 'MONITOR_SERVER_TIMING', False)
+        install_template_timer()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = request.metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with record_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_response(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        # The sync middleware & views run their queries in the request's sync
+        # thread, which has its own connections: the recording is installed
+        # there. The async views count the queries they run in the pool.
+        recording = ExitStack()
+        try:
+            await sync_to_async(recording.enter_context)(record_queries(metrics))
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+            current_metrics.reset(token)
+        return self.process_response(request, response, metrics)
+
+    def process_response(self, request, response, metrics):
+        """Completes the metrics with the response, then reports them."""
+        metrics.stop()
+
+        # Streamed responses are sent after the middleware returns
+        if not response.streaming:
+            metrics.size = len(response.content)
+        if request.resolver_match is not None:
+            metrics.view = request.resolver_match.view_name or request.resolver_match._func_path
+
+        if self.server_timing:
+            response['Server-Timing'] = format_server_timing(metrics)
+        observe_request(request, metrics)
+        log_request(request, response, metrics, self.slow_request, self.slowest_queries)
+        return response
+
+
+def format_server_timing(metrics):
+    """Formats the metrics as a Server-Timing header, in milliseconds."""
+    return ", ".join((
+        f"total;dur={metrics.duration * 1000:.1f}",
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{len(metrics.queries)} queries"',
+        f"template;dur={metrics.template_time * 1000:.1f}",
+    ))
+
+
+def log_request(request, response, metrics, slow_request, slowest_queries):
+    """Logs the metrics of the request, along with its slowest queries when it is slow."""
+    message = "%s %s (%s) %s in %.1fms, %d queries in %.1fms, templates in %.1fms, %s bytes"
+    arguments = (
+        request.method, request.path, metrics.view, response.status_code,
+        metrics.duration * 1000, len(metrics.queries), metrics.sql_time * 1000,
+        metrics.template_time * 1000, metrics.size if metrics.size is not None else "streamed",
+    )
+    if metrics.duration < slow_request:
+        logger.debug(message, *arguments)
+        return
+    queries = "".join(f"\n  {duration * 1000:.1f}ms {truncate_sql(sql)}" for duration, sql in metrics.slowest_queries(slowest_queries))
+    logger.warning("Slow request: " + message + "%s", *arguments, queries)
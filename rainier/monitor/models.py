@@ -0,0 +1,35 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+
+# Create your models here.
+
+class RequestProfile(models.Model):
+    """
+    Represents the cProfile statistics and the SQL trace of a single
+    profiled request, keyed by the request id sent back in the
+    X-Request-ID header (see monitor/profiling.py).
+    """
+    request_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    view = models.CharField(max_length=255, blank=True)
+    status = models.PositiveSmallIntegerField(null=True)
+    trigger = models.CharField(max_length=20)
+    duration = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    sql_time = models.FloatField(default=0)
+    statistics = models.TextField()
+    sql_trace = models.TextField(blank=True)
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.request_id} - {self.method} {self.path} - {self.duration * 1000:.0f}ms"
+
+    class Meta:
+        verbose_name = 'Request profile'
+        verbose_name_plural = 'Request profiles'
+        ordering = ['-created']
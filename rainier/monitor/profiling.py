@@ -0,0 +1,139 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import uuid
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from monitor.instrumentation import QueryRecorder, RequestMetrics
+from monitor.models import RequestProfile
+
+logger = logging.getLogger('monitor')
+
+# No. of functions listed in the stored statistics, by cumulative time
+PROFILE_LINES = 60
+
+
+class ProfilerMiddleware:
+    """
+    Runs the requests that ask for it under cProfile and stores the profile,
+    along with the SQL trace, as a RequestProfile viewable from the admin.
+
+    A request is profiled when a staff user adds the MONITOR_PROFILE_PARAMETER
+    query parameter (e.g. /?profile=1) or sends the X-Profile header, or at
+    random, at the MONITOR_PROFILE_SAMPLE_RATE rate (0 to 1) of all requests.
+    The id of the stored profile is returned in the X-Request-ID header.
+
+    Under ASGI, cProfile only sees the thread it runs on, so the profiled
+    requests run the rest of the stack in the request's sync thread, as a
+    sync-only middleware would; the other requests are not adapted. The
+    queries the async views run in the query pool are not traced.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.parameter = getattr(settings, 'MONITOR_PROFILE_PARAMETER', 'profile')
+        self.sample_rate = getattr(settings, 'MONITOR_PROFILE_SAMPLE_RATE', 0)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        trigger = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, self.get_response, trigger)
+
+    async def __acall__(self, request):
+        # The user is loaded in the request's sync thread, when it is checked
+        if self.is_requested(request):
+            trigger = await sync_to_async(self.get_trigger)(request)
+        else:
+            trigger = self.get_trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(request, async_to_sync(self.get_response), trigger)
+
+    def profile(self, request, get_response, trigger):
+        """Gets the response under cProfile, then stores the profile."""
+        metrics = RequestMetrics()
+        trace = []
+        profiler = cProfile.Profile()
+        with connection.execute_wrapper(SQLTracer(metrics, trace)):
+            response = profiler.runcall(get_response, request)
+        metrics.stop()
+
+        request_id = uuid.uuid4()
+        response['X-Request-ID'] = str(request_id)
+        try:
+            store_profile(request, response, request_id, trigger, profiler, metrics, trace)
+        except DatabaseError:
+            logger.exception("Could not store the profile of %s %s", request.method, request.path)
+        return response
+
+    def is_requested(self, request):
+        """Returns whether the request asks to be profiled, which staff users only may do."""
+        return self.parameter in request.GET or 'HTTP_X_PROFILE' in request.META
+
+    def get_trigger(self, request):
+        """Returns what asks for the request to be profiled, if anything."""
+        # Checks the user last, so that other requests never load it
+        if self.is_requested(request) and request.user.is_staff:
+            return "staff"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampling"
+        return None
+
+
+class SQLTracer(QueryRecorder):
+    """
+    Records every SQL query, along with its duration, while it is installed
+    as an execute wrapper. The parameters are left out: they hold the session
+    keys & the data of the profiled users, which any staff member could read
+    from the admin.
+    """
+
+    def __init__(self, metrics, trace):
+        super().__init__(metrics)
+        self.trace = trace
+
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            duration = self.metrics.queries[-1][0]
+            self.trace.append(f"{duration * 1000:8.2f}ms  {sql}")
+
+
+def store_profile(request, response, request_id, trigger, profiler, metrics, trace):
+    """Stores the profile & the SQL trace of the request."""
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_LINES)
+    profiler.create_stats()
+
+    match = request.resolver_match
+    RequestProfile.objects.create(
+        request_id=request_id,
+        user=request.user if request.user.is_authenticated else None,
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        view=(match.view_name or match._func_path) if match is not None else "",
+        status=response.status_code,
+        trigger=trigger,
+        duration=metrics.duration,
+        query_count=len(metrics.queries),
+        sql_time=metrics.sql_time,
+        statistics=output.getvalue(),
+        sql_trace="\n".join(trace),
+        data=marshal.dumps(profiler.stats),
+    )
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from monitor.metrics import count_transactions
+from wallet.models import Transaction
+
+
+# Counts the transactions written through the ORM
+#
+# Bulk paths that bypass the model signals (e.g. the statement import)
+# count their transactions themselves.
+
+@receiver(post_save, sender=Transaction)
+def count_saved(sender, instance, created, raw=False, **kwargs):
+    """Counts the created or edited transaction, fixtures aside."""
+    if not raw:
+        count_transactions("created" if created else "edited")
+
+
+@receiver(post_delete, sender=Transaction)
+def count_deleted(sender, instance, **kwargs):
+    """Counts the deleted transaction."""
+    count_transactions("deleted")
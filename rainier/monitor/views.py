@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from monitor.metrics import export
+
+# Create your views here.
+
+def metrics_view(request):
+    """Exposes the aggregated metrics to Prometheus, for the allowed addresses only."""
+    allowed = getattr(settings, 'MONITOR_METRICS_ALLOWED_IPS', None)
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    content, content_type = export()
+    return HttpResponse(content, content_type=content_type)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rainier.settings')
+# Serves the dashboard & the entry listing with their async views
+os.environ.setdefault('RAINIER_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
     'authenticator',
     'budgeter',
     'wallet',
+    'monitor',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,11 +47,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitor.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitor.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,14 +81,95 @@ WSGI_APPLICATION = 'rainier.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
+# The connections persist for CONN_MAX_AGE seconds: the threads of the async
+# views' query pool would otherwise open a connection per query.
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# The reference data cache (budgeter/cache.py) shares its version key through
+# the default cache: use a backend shared by the worker processes (e.g.
+# file-based, Redis or Memcached) when running more than one.
+# The 'statistics' cache holds the dashboard statistics of each user (see
+# wallet/stats.py), keyed by data version: stale entries are never read and
+# expire after TIMEOUT seconds. Any backend works, e.g.
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/var/tmp/rainier-statistics'
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'
+#   'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': '127.0.0.1:11211'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'statistics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'statistics',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Async views
+# Serves the dashboard & the entry listing with async views running their
+# independent queries concurrently in a pool of WALLET_QUERY_THREADS threads
+# (see wallet/concurrency.py). rainier/asgi.py turns them on through the
+# RAINIER_ASYNC_VIEWS environment variable: WSGI servers would run every
+# async view in an event loop of its own.
+
+WALLET_ASYNC_VIEWS = os.environ.get('RAINIER_ASYNC_VIEWS') == '1'
+WALLET_QUERY_THREADS = 8
+
+# Finder debugging
+# Answers /entries/explain with the conditions compiled from the search &
+# filter criteria of the request, along with the SQL & the query plan of the
+# entry listing (see wallet/services.py), to staff users at any time and to
+# every user while WALLET_FINDER_DEBUG is set.
+
+WALLET_FINDER_DEBUG = DEBUG
+
+# Instrumentation
+# Measures the wall time, SQL queries, template rendering time & response size
+# of every request (see monitor/middleware.py) and logs the slow ones to the
+# 'monitor' logger. Server-Timing headers expose the figures to the browser,
+# the /metrics endpoint aggregates them for Prometheus (see monitor/metrics.py).
+
+MONITOR_ENABLED = True
+MONITOR_SLOW_REQUEST = 0.5
+MONITOR_SLOWEST_QUERIES = 5
+MONITOR_SERVER_TIMING = DEBUG
+
+# Addresses allowed to scrape the /metrics endpoint (None allows any)
+MONITOR_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Profiles the requests of staff users passing ?profile=1 (or an X-Profile
+# header), and the given share of all requests, under cProfile. The profiles
+# are stored with their SQL trace & listed in the admin (monitor/profiling.py).
+MONITOR_PROFILE_PARAMETER = 'profile'
+MONITOR_PROFILE_SAMPLE_RATE = 0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'monitor': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 GRAPH_MODELS = {
   'all_applications': True,
   'group_models': True,
@@ -13,12 +13,19 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
 from authenticator import views as authenticator_views
+from monitor import views as monitor_views
 from wallet import views as wallet_views
 
+# Async views of the dashboard, the entry listing & the statistics, when served through ASGI
+if settings.WALLET_ASYNC_VIEWS:
+    dashboard, loader, statistics = wallet_views.Viewer.dashboard_async, wallet_views.Viewer.loader_async, wallet_views.statistics_view_async
+else:
+    dashboard, loader, statistics = wallet_views.Viewer.dashboard, wallet_views.Viewer.loader, wallet_views.statistics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,9 +35,19 @@ urlpatterns = [
     path('logout', authenticator_views.logout_view, name='logout'),
     path('account', authenticator_views.Utilities.account, name='account'),
     path('preferences', authenticator_views.Utilities.preferences, name='preferences'),
-    path('', wallet_views.Viewer.dashboard, name='home'),
+    path('', dashboard, name='home'),
+    path('entries', loader, name='entries'),
+    path('entries/explain', wallet_views.finder_explain_view, name='entries_explain'),
+    path('export', wallet_views.Viewer.exporter, name='export'),
     path('create', wallet_views.Viewer.creator, name='create'),
+    path('import', wallet_views.Viewer.importer, name='import'),
     path('edit/<str:pk>', wallet_views.Viewer.editor, name='edit'),
     path('delete/<str:pk>', wallet_views.Viewer.eraser, name='delete'),
     path('ajax/categories/', wallet_views.categories_view, name='ajax_categories'),
+    path('stats/balance', statistics, {'section': 'balance'}, name='stats_balance'),
+    path('stats/categories', statistics, {'section': 'categories'}, name='stats_categories'),
+    path('stats/months', statistics, {'section': 'months'}, name='stats_months'),
+    path('stats/days', statistics, {'section': 'days'}, name='stats_days'),
+    path('stats/trends', wallet_views.trends_view, name='stats_trends'),
+    path('metrics', monitor_views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,7 +1,10 @@
 from django.contrib import admin
 
-from wallet.models import Transaction
+from wallet.models import DailyTotal, MonthlyTotal, SearchToken, Transaction
 
 # Register your models here.
 
-admin.site.register(Transaction)
\ No newline at end of file
+admin.site.register(Transaction)
+admin.site.register(DailyTotal)
+admin.site.register(MonthlyTotal)
+admin.site.register(SearchToken)
\ No newline at end of file
@@ -0,0 +1,192 @@
+import datetime
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+import numpy as np
+
+from authenticator.versions import get_version
+from monitor.metrics import count_cache
+from wallet.models import Transaction
+from wallet.services import TYPE_EXPENSE, TYPE_INCOME
+
+# Max. no. of user histories kept in memory by each process
+HISTORY_LIMIT = 32
+
+# Histories loaded by the current process, least recently used first, along
+# with the lock guarding them against the other request threads
+histories = OrderedDict()
+histories_lock = threading.Lock()
+
+# No. of days of the daily average & no. of categories of the trends served to the dashboard
+AVERAGE_WINDOW = 30
+TRENDS_CATEGORIES = 5
+
+
+class History:
+    """
+    Represents the user's transactions as compact, date-ordered NumPy
+    columns: day ordinals, months (year * 12 + month - 1), amounts in
+    integer cents, type & category ids.
+    """
+    __slots__ = ('version', 'days', 'months', 'cents', 'types', 'categories')
+
+    def __init__(self, user, version=None):
+        rows = Transaction.objects.filter(user=user).order_by('date').values_list('date', 'amount', 'type_id', 'category_id')
+        dates, amounts, types, categories = zip(*rows) if rows else ((), (), (), ())
+
+        self.version = version
+        self.days = np.fromiter((date.toordinal() for date in dates), dtype=np.int32, count=len(dates))
+        self.months = np.fromiter((date.year * 12 + date.month - 1 for date in dates), dtype=np.int32, count=len(dates))
+        self.cents = np.fromiter((int(amount * 100) for amount in amounts), dtype=np.int64, count=len(amounts))
+        self.types = np.array(types, dtype=np.int8)
+        self.categories = np.array(categories, dtype=np.int16)
+
+    def __len__(self):
+        return len(self.cents)
+
+
+# Loads & caches the histories
+#
+# Each user's history is tagged with their data version, bumped on every
+# write of their transactions (see authenticator/versions.py), so that every
+# worker process reloads a history once it is stale. The writes themselves
+# have nothing to invalidate. Histories are loaded outside the lock, so that
+# a slow load never holds up the other users.
+
+def get_history(profile):
+    """Returns the profile's user history, reloading it if it changed since it was loaded."""
+    user_id, version = profile.user_id, get_version(profile)
+    with histories_lock:
+        history = histories.get(user_id)
+        hit = history is not None and history.version == version
+        if hit:
+            histories.move_to_end(user_id)
+    count_cache("analytics", hit)
+    if hit:
+        return history
+
+    history = History(user_id, version)
+    with histories_lock:
+        histories[user_id] = history
+        histories.move_to_end(user_id)
+        while len(histories) > HISTORY_LIMIT:
+            histories.popitem(last=False)
+    return history
+
+
+# Computes the dashboard metrics
+
+def to_amount(cents):
+    """Converts an amount in cents into a Decimal."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def to_month(month):
+    """Converts a month index (year * 12 + month - 1) into its first day."""
+    return datetime.date(int(month) // 12, int(month) % 12 + 1, 1)
+
+
+def balance(history):
+    """Returns the user's balance."""
+    return to_amount(history.cents[history.types == TYPE_INCOME].sum() - history.cents[history.types == TYPE_EXPENSE].sum())
+
+
+def monthly_totals(history, start_date, end_date):
+    """Returns the total amount per month & type within the date range."""
+    selected = (history.days >= start_date.toordinal()) & (history.days <= end_date.toordinal())
+    totals = {}
+    for type_id in (TYPE_EXPENSE, TYPE_INCOME):
+        mask = selected & (history.types == type_id)
+        months, indices = np.unique(history.months[mask], return_inverse=True)
+        sums = np.bincount(indices, weights=history.cents[mask], minlength=len(months))
+        totals.update({(to_month(month), type_id): to_amount(total) for month, total in zip(months, sums)})
+    return totals
+
+
+def category_totals(history, start_date, end_date, type_id=TYPE_EXPENSE):
+    """Returns the total amount per category of the given type within the date range."""
+    mask = (history.days >= start_date.toordinal()) & (history.days <= end_date.toordinal()) & (history.types == type_id)
+    categories, indices = np.unique(history.categories[mask], return_inverse=True)
+    sums = np.bincount(indices, weights=history.cents[mask], minlength=len(categories))
+    return {int(category): to_amount(total) for category, total in zip(categories, sums)}
+
+
+def daily_totals(history):
+    """Returns the no. of entries & the net amount per day, latest first."""
+    days, indices, counts = np.unique(history.days, return_inverse=True, return_counts=True)
+    signed = np.where(history.types == TYPE_EXPENSE, -history.cents, history.cents)
+    sums = np.bincount(indices, weights=signed, minlength=len(days))
+    return {datetime.date.fromordinal(int(day)): [int(count), to_amount(total)] for day, count, total in zip(days[::-1], counts[::-1], sums[::-1])}
+
+
+# Computes the metrics beyond the dashboard
+
+def daily_series(history, type_id=TYPE_EXPENSE, end_date=None):
+    """
+    Returns the first day and the total amount (in cents) of each consecutive
+    day of the history, up to the given day if it comes after the last entry.
+    """
+    if not len(history):
+        return None, np.zeros(0, dtype=np.int64)
+    first = int(history.days[0])
+    last = max(int(history.days[-1]), end_date.toordinal() if end_date else 0)
+    mask = history.types == type_id
+    series = np.bincount(history.days[mask] - first, weights=history.cents[mask], minlength=last - first + 1)
+    return datetime.date.fromordinal(first), series.astype(np.int64)
+
+
+def rolling_average(history, window=30, type_id=TYPE_EXPENSE, end_date=None):
+    """Returns the rolling average of the daily amounts over the given no. of days, per day."""
+    first, series = daily_series(history, type_id, end_date)
+    if len(series) < window:
+        return {}
+    sums = np.cumsum(np.concatenate(([0], series)))
+    averages = (sums[window:] - sums[:-window]) / window / 100
+    return {first + datetime.timedelta(days=window - 1 + index): round(float(value), 2) for index, value in enumerate(averages)}
+
+
+def percentiles(history, quantiles=(50, 90, 99), type_id=TYPE_EXPENSE):
+    """Returns the given percentiles of the entry amounts of the given type."""
+    amounts = history.cents[history.types == type_id]
+    if not len(amounts):
+        return {}
+    return {quantile: round(float(value) / 100, 2) for quantile, value in zip(quantiles, np.percentile(amounts, quantiles))}
+
+
+def category_trends(history, today=None, count=6, type_id=TYPE_EXPENSE):
+    """Returns the monthly totals of each category over the last months, oldest first."""
+    if today is None:
+        today = datetime.date.today()
+    last = today.year * 12 + today.month - 1
+    first = last - count + 1
+    mask = (history.months >= first) & (history.months <= last) & (history.types == type_id)
+    categories, rows = np.unique(history.categories[mask], return_inverse=True)
+    matrix = np.zeros((len(categories), count), dtype=np.int64)
+    np.add.at(matrix, (rows, history.months[mask] - first), history.cents[mask])
+    return {
+        "months": [to_month(month) for month in range(first, last + 1)],
+        "categories": {int(category): [to_amount(total) for total in totals] for category, totals in zip(categories, matrix)},
+    }
+
+
+# Summarizes the metrics for the dashboard
+
+def get_trends(history, category_labels, today=None):
+    """
+    Returns the expense trends shown on the dashboard: the daily average over
+    the last AVERAGE_WINDOW days, the percentiles of the entry amounts and
+    the monthly totals of the TRENDS_CATEGORIES categories spent the most on
+    over the last six months.
+    """
+    if today is None:
+        today = datetime.date.today()
+    averages = rolling_average(history, AVERAGE_WINDOW, end_date=today)
+    trends = category_trends(history, today)
+    categories = sorted(trends["categories"].items(), key=lambda item: sum(item[1]), reverse=True)[:TRENDS_CATEGORIES]
+    return {
+        "average_daily": averages.get(today, 0),
+        "percentiles": percentiles(history),
+        "labels_months": [month.strftime("%B") for month in trends["months"]],
+        "categories": [{"label": category_labels.get(category, ""), "values": totals} for category, totals in categories],
+    }
@@ -0,0 +1,501 @@
+import datetime
+import http.client
+import io
+import itertools
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.template import Context, Engine
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from authenticator.models import Profile
+from budgeter.cache import get_reference
+from budgeter.models import Category, Type
+from wallet import analytics
+from wallet.importer import import_entries, parse_csv
+from wallet.models import Transaction
+from wallet.rollups import range_totals
+from wallet.seed import populate
+from wallet.services import ENTRY_COLUMNS, TYPE_EXPENSE, TYPE_INCOME, EntryRow, build_rows
+from wallet.stats import STATISTICS_SECTIONS, compute_statistics, get_previous_months, get_statistics, group_days
+from wallet.views import Viewer, statistics_view
+
+# Entry listing as rendered before the entries were grouped by day, kept
+# as the baseline of the render benchmark: every day loops over all entries.
+LEGACY_ENTRIES_TEMPLATE = """
+{% for day, statistics in summary_daily.items %}
+    <small>{{ day }} {{ statistics.0 }} {{ statistics.1|floatformat:2 }} {{ currency_short }}</small>
+    {% for entry in entries %}
+        {% if entry.date == day %}
+        <a href="/edit/{{ entry.id }}">
+            <h6>{{ entry.name }}</h6>
+            {% if entry.TransactionType == "Expense" %}<h6>-{{ entry.amount }} {{ currency_short }}</h6>
+            {% elif entry.TransactionType == "Income" %}<h6>+{{ entry.amount }} {{ currency_short }}</h6>{% endif %}
+            <small>{{ entry.category }}</small><small>{{ entry.type }}</small>
+            <small>{{ entry.note }}</small>
+        </a>
+        {% endif %}
+    {% endfor %}
+{% endfor %}
+"""
+
+
+# Month names in calendar order, as listed by the legacy dashboard
+LEGACY_MONTHS = [datetime.date(2000, month, 1).strftime("%B") for month in range(1, 13)]
+
+
+def legacy_dashboard_metrics(user, categories_expenses):
+    """
+    Computes the dashboard metrics with the loops Viewer.dashboard ran over
+    the model instances before the rollups & the NumPy histories, kept as
+    the baseline of the analytics benchmark: the daily summary loops over
+    all entries for every day and looks each one up in the expenses & income
+    querysets, and the categories of the current month are loaded one by one.
+    """
+    entries = Transaction.objects.filter(user=user).order_by('-date', '-amount', 'name')
+    expenses = entries.filter(type="1").order_by('-amount')
+    income = entries.filter(type="2").order_by('-amount')
+    query = Transaction.objects.filter(user=user).order_by('-date', '-amount', 'name')
+
+    balance_total = 0
+    for entry in expenses:
+        balance_total -= entry.amount
+    for entry in income:
+        balance_total += entry.amount
+
+    days = list(dict.fromkeys([item.date for item in query]))
+    balance_daily = dict.fromkeys(days, 0)
+    counter_daily = dict.fromkeys(days, 0)
+    for day in days:
+        for entry in query:
+            if entry.date == day:
+                counter_daily[day] += 1
+                if entry in expenses:
+                    balance_daily[day] -= round(float(entry.amount), 2)
+                if entry in income:
+                    balance_daily[day] += round(float(entry.amount), 2)
+    summary_daily = dict(zip(days, ([count, total] for count, total in zip(counter_daily.values(), balance_daily.values()))))
+
+    day_current = datetime.datetime.now()
+    month_current, year_current, year_previous = day_current.strftime("%B"), day_current.strftime("%Y"), str(day_current.year - 1)
+    expenses_current = income_current = 0
+    for entry in expenses:
+        if Transaction.TransactionMonth(entry) == month_current and Transaction.TransactionYear(entry) == year_current:
+            expenses_current += entry.amount
+    for entry in income:
+        if Transaction.TransactionMonth(entry) == month_current and Transaction.TransactionYear(entry) == year_current:
+            income_current += entry.amount
+
+    months_previous = []
+    month_start = day_current.replace(day=1)
+    for _ in range(6):
+        month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+        months_previous.append(month_start.strftime("%B"))
+    expenses_previous = dict.fromkeys(months_previous, 0)
+    income_previous = dict.fromkeys(months_previous, 0)
+    in_order = months_previous == sorted(months_previous, key=LEGACY_MONTHS.index, reverse=True)
+    for month in months_previous:
+        year = year_current if in_order or month in LEGACY_MONTHS[:5] else year_previous
+        for entry in expenses:
+            if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year:
+                expenses_previous[month] += entry.amount
+        for entry in income:
+            if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year:
+                income_previous[month] += entry.amount
+
+    data_expenses_current = dict.fromkeys([category.name for category in categories_expenses], 0)
+    for entry in expenses:
+        if month_current == Transaction.TransactionMonth(entry) and Transaction.TransactionYear(entry) == year_current:
+            data_expenses_current[Transaction.TransactionCategory(entry).replace(" ", "")[1:]] += entry.amount
+
+    return balance_total, summary_daily, expenses_current, income_current, expenses_previous, income_previous, data_expenses_current
+
+
+# Builds the entries for the benchmarks
+
+def build_categories():
+    """Builds unsaved types & categories mirroring the fixtures."""
+    types = {pk: Type(pk=pk, name=name) for pk, name in ((1, "Expense"), (2, "Income"))}
+    return [Category(pk=pk, name=f"Category {pk}", logo="#", type=types[1 if pk <= 10 else 2]) for pk in range(1, 14)]
+
+
+def build_entries(size, categories=None, user=None, days=365, seed=0):
+    """Builds unsaved, date-ordered entries spread over the given no. of days."""
+    rng = random.Random(seed)
+    categories = categories or build_categories()
+    today = datetime.date.today()
+    entries = []
+    for pk in range(1, size + 1):
+        category = rng.choice(categories)
+        entries.append(Transaction(
+            pk=None if user else pk,
+            user=user,
+            date=today - datetime.timedelta(days=rng.randrange(days)),
+            type=category.type,
+            category=category,
+            name=f"Entry {pk}",
+            amount=Decimal(rng.randrange(100, 100000)) / 100,
+            note="",
+        ))
+    entries.sort(key=lambda entry: (-entry.date.toordinal(), -entry.amount, entry.name))
+    return entries
+
+
+@contextmanager
+def scratch_user(size, seed=0):
+    """
+    Creates a user with the given no. of generated entries in the database,
+    for the duration of the block only: every write is rolled back on exit.
+    """
+    with transaction.atomic():
+        user = User.objects.create_user(f"benchmark-{uuid.uuid4().hex[:8]}")
+        Profile.objects.create(user=user, currency=get_reference().currencies[0])
+        populate(user, size, seed)
+        yield user
+        transaction.set_rollback(True)
+
+
+def measure(function, repeat=3, setup=None):
+    """
+    Returns the best wall time of the function over the given no. of runs,
+    in seconds. The result of setup(), if any, is passed to the function
+    and its own time is left out.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        function(argument) if setup else function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_memory(function):
+    """Returns the no. of bytes allocated by the function & still held by its result, and the peak no. of bytes allocated."""
+    tracemalloc.start()
+    try:
+        result = function()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def scan_range_totals(user, start_date, end_date):
+    """Returns the totals of range_totals() by summing the user's entries of the range, the baseline of the running totals."""
+    return Transaction.objects.filter(user=user, date__range=[start_date, end_date]).aggregate(
+        count=Count('id'),
+        expenses=Sum('amount', filter=Q(type=TYPE_EXPENSE)),
+        income=Sum('amount', filter=Q(type=TYPE_INCOME)),
+    )
+
+
+def count_queries(function, *args):
+    """Returns the no. of SQL queries run by the function."""
+    # The query log is capped, so that long runs would no longer be counted
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as queries:
+        function(*args)
+    return len(queries)
+
+
+# Benchmark suites
+
+def benchmark_render(size=10000, repeat=3):
+    """Times the rendering of the entry listing, nested per-day loops vs. day groups."""
+    entries = build_entries(size)
+    legacy = Engine.get_default().from_string(LEGACY_ENTRIES_TEMPLATE)
+
+    def render_legacy():
+        summary_daily = {}
+        for entry in entries:
+            statistics = summary_daily.setdefault(entry.date, [0, 0])
+            statistics[0] += 1
+        legacy.render(Context({"entries": entries, "summary_daily": summary_daily, "currency_short": "USD"}))
+
+    # The listing renders compact rows rather than model instances
+    rows = [EntryRow(entry.pk, entry.date, entry.type_id, entry.category_id, entry.name, entry.amount, entry.note, str(entry.type), str(entry.category)) for entry in entries]
+
+    def render_grouped():
+        render_to_string("entries.html", {"days": group_days(rows), "currency_short": "USD"})
+
+    return {
+        "entries": size,
+        "legacy_seconds": measure(render_legacy, repeat),
+        "grouped_seconds": measure(render_grouped, repeat),
+    }
+
+
+def benchmark_analytics(size=100000, repeat=3, legacy_size=2000):
+    """
+    Times the dashboard metrics: the legacy model instance loops vs. the NumPy
+    columns at legacy_size entries, as the legacy loops are quadratic, then
+    the NumPy columns vs. the rollups vs. the cached statistics, and the
+    totals of a year, at the given size.
+    """
+    today = datetime.date.today()
+    start_date = get_previous_months(today)[-1]
+    year_start = today - datetime.timedelta(days=365)
+    categories_expenses, categories_income = Category.CategoryList(Category)
+
+    def vectorized(history):
+        analytics.balance(history)
+        analytics.monthly_totals(history, start_date, today)
+        analytics.category_totals(history, today.replace(day=1), today)
+        analytics.daily_totals(history)
+
+    with scratch_user(legacy_size) as user:
+        results = {
+            "legacy_entries": legacy_size,
+            "legacy_loops_seconds": measure(lambda: legacy_dashboard_metrics(user, categories_expenses), 1),
+            "legacy_numpy_seconds": measure(lambda: vectorized(analytics.History(user.pk)), repeat),
+        }
+
+    with scratch_user(size) as user:
+        profile = Profile.objects.get(user=user)
+
+        def extended():
+            history = analytics.get_history(profile)
+            analytics.rolling_average(history)
+            analytics.percentiles(history)
+            analytics.category_trends(history, today)
+
+        return {
+            **results,
+            "entries": size,
+            "numpy_load_seconds": measure(lambda: analytics.History(user.pk), repeat),
+            "numpy_metrics_seconds": measure(lambda: vectorized(analytics.get_history(profile)), repeat),
+            "numpy_extended_seconds": measure(extended, repeat),
+            "rollups_seconds": measure(lambda: compute_statistics(user, categories_expenses), repeat),
+            "cached_seconds": measure(lambda: get_statistics(profile, categories_expenses, "benchmark"), repeat),
+            "range_scan_seconds": measure(lambda: scan_range_totals(user, year_start, today), repeat),
+            "range_prefix_seconds": measure(lambda: range_totals(user, year_start, today), repeat),
+        }
+
+
+def benchmark_import(size=50000, repeat=1):
+    """Times the bulk import of a CSV statement, in rows per second."""
+    reference = get_reference()
+    lines = ["date,type,category,name,amount,note"]
+    for entry in build_entries(size, reference.categories):
+        lines.append(f"{entry.date.isoformat()},{entry.type.name},{entry.category.name},{entry.name},{entry.amount},")
+    statement = "\n".join(lines).encode()
+
+    timings = []
+    for _ in range(repeat):
+        with scratch_user(0) as user:
+            start = time.perf_counter()
+            result = import_entries(user, parse_csv(io.BytesIO(statement)))
+            timings.append(time.perf_counter() - start)
+        assert result.created == size, result
+    return {
+        "entries": size,
+        "import_seconds": min(timings),
+        "rows_per_second": size / min(timings),
+    }
+
+
+def benchmark_memory(size=50000, repeat=3):
+    """
+    Measures the memory allocated to list all the entries of a user, as model
+    instances along with their type & category vs. as compact rows, and by
+    the dashboard request. Each figure is taken while the listing is alive.
+    """
+    factory = RequestFactory()
+
+    with scratch_user(size) as user:
+        entries = Transaction.objects.filter(user=user).order_by('-date', '-amount', 'name')
+
+        def dashboard():
+            request = factory.get("/")
+            request.user = user
+            return Viewer.dashboard(request)
+
+        listings = {
+            "instances": lambda: group_days(list(entries.select_related('type', 'category'))),
+            "rows": lambda: group_days(build_rows(entries.values_list(*ENTRY_COLUMNS))),
+            "dashboard": dashboard,
+        }
+        results = {"entries": size}
+        for name, function in listings.items():
+            # Timed first, so that the memory figures leave out the allocations of the first call (e.g. template loading)
+            results[f"{name}_seconds"] = measure(function, repeat)
+            results[f"{name}_retained_bytes"], results[f"{name}_peak_bytes"] = measure_memory(function)
+    return results
+
+
+def get_finder_filters(today=None):
+    """Returns the query strings of the finder filters, by name."""
+    today = today or datetime.date.today()
+    quarter = f"{today - datetime.timedelta(days=90):%m/%d/%Y} - {today:%m/%d/%Y}"
+    return {
+        "type": {"input-type": "Expense"},
+        "category": {"input-category": "Groceries"},
+        "date": {"input-date": quarter},
+        "search": {"input-search": "weekly"},
+        "category_search": {"input-category-search": "ing"},
+        "advanced": {"input-type-advanced": "Expense", "input-category-advanced": "Dining", "input-date": quarter},
+    }
+
+
+def get_finder_combinations(filters):
+    """Returns every combination of the basic filters, then the other ones alone."""
+    basic = ("type", "category", "date", "search")
+    combinations = {}
+    for count in range(1, len(basic) + 1):
+        for names in itertools.combinations(basic, count):
+            combinations["+".join(names)] = {key: value for name in names for key, value in filters[name].items()}
+    for name in filters.keys() - set(basic):
+        combinations[name] = filters[name]
+    return combinations
+
+
+def benchmark_views(size=10000, repeat=3):
+    """Times the dashboard (unfiltered & with each finder filter combination), the statistics API and the entry form views."""
+    factory = RequestFactory()
+    results = {"entries": size}
+
+    with scratch_user(size) as user:
+        entry = Transaction.objects.filter(user=user).first()
+        form = {"type": entry.type_id, "name": "Benchmark", "amount": "12.34", "date": f"{datetime.date.today():%m/%d/%Y}", "category": entry.category_id, "note": "", "duplicate": "on"}
+
+        def call(view, method="get", path="/", data=None, **kwargs):
+            request = getattr(factory, method)(path, data or {})
+            request.user = user
+            return view(request, **kwargs)
+
+        def create_entry():
+            return Transaction.objects.create(user=user, date=entry.date, type_id=entry.type_id, category_id=entry.category_id, name="Benchmark", amount=1)
+
+        views = {
+            "dashboard": (lambda: call(Viewer.dashboard), None),
+            **{
+                f"finder[{name}]": (lambda data=data: call(Viewer.dashboard, data=data), None)
+                for name, data in get_finder_combinations(get_finder_filters()).items()
+            },
+            **{
+                f"statistics[{section}]": (lambda section=section: call(statistics_view, path=f"/stats/{section}", section=section), None)
+                for section in STATISTICS_SECTIONS
+            },
+            "creator": (lambda: call(Viewer.creator, "post", "/create", form), None),
+            "editor": (lambda: call(Viewer.editor, "post", f"/edit/{entry.pk}", form, pk=entry.pk), None),
+            "eraser": (lambda created: call(Viewer.eraser, "post", f"/delete/{created.pk}", pk=created.pk), create_entry),
+        }
+        for name, (function, setup) in views.items():
+            results[f"{name}_queries"] = count_queries(function, *([setup()] if setup else []))
+            results[f"{name}_seconds"] = measure(function, repeat, setup)
+
+    return results
+
+
+# Load tests against a running server
+#
+# The in-process suites run within a rolled back transaction, so they cannot
+# measure a server: the load tests log in as an existing user (e.g. created
+# by the seed command) and request the given paths from a running WSGI or
+# ASGI server, each client keeping its connection alive.
+
+def get_connection(url):
+    """Opens a connection to the server of the URL."""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return connection_class(parts.netloc, timeout=60)
+
+
+def log_in(url, username, password):
+    """Logs in to the server, returning the Cookie header of the session, None if the login failed."""
+    cookies = SimpleCookie()
+    connection = get_connection(url)
+    try:
+        connection.request("GET", "/login")
+        response = connection.getresponse()
+        response.read()
+        for header in response.headers.get_all("Set-Cookie", []):
+            cookies.load(header)
+
+        body = urlencode({"username": username, "password": password, "csrfmiddlewaretoken": cookies["csrftoken"].value})
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Cookie": "; ".join(f"{key}={morsel.value}" for key, morsel in cookies.items()),
+            "Referer": f"{url.rstrip('/')}/login",
+        }
+        connection.request("POST", "/login", body, headers)
+        response = connection.getresponse()
+        response.read()
+        for header in response.headers.get_all("Set-Cookie", []):
+            cookies.load(header)
+    finally:
+        connection.close()
+    if "sessionid" not in cookies:
+        return None
+    return "; ".join(f"{key}={morsel.value}" for key, morsel in cookies.items())
+
+
+def load_test(url, paths, cookie, concurrency=8, requests=200):
+    """
+    Requests the paths in turn from the given no. of concurrent clients,
+    returning the throughput and the latency percentiles (in milliseconds).
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def client():
+        nonlocal errors
+        connection = get_connection(url)
+        try:
+            while (index := next(counter)) < requests:
+                path = paths[index % len(paths)]
+                start = time.perf_counter()
+                connection.request("GET", path, headers={"Cookie": cookie})
+                response = connection.getresponse()
+                response.read()
+                latency = time.perf_counter() - start
+                with lock:
+                    latencies.append(latency)
+                    errors += response.status != 200
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    duration = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / duration,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p90_ms": percentiles[89] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+SUITES = {
+    "render": benchmark_render,
+    "analytics": benchmark_analytics,
+    "import": benchmark_import,
+    "views": benchmark_views,
+    "memory": benchmark_memory,
+}
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from monitor.instrumentation import current_metrics, record_queries
+
+# Runs the queries of the async views
+#
+# Django 4.0 has no async ORM, so the async views hand their queries over to
+# this pool: the independent queries of a request (e.g. the entries & the
+# statistics of the dashboard) overlap instead of running one after another.
+# Each thread holds its own database connection, so WALLET_QUERY_THREADS
+# bounds the no. of connections opened by the pool in each process. The
+# connections follow CONN_MAX_AGE, as the ones of the request threads do.
+# request_finished only cleans up the request thread's connections, so the
+# pool's are checked after each call, then kept open for the next calls
+# until they expire or fail.
+#
+# sync_to_async() takes an executor since asgiref 3.7.
+
+executor = ThreadPoolExecutor(max_workers=getattr(settings, 'WALLET_QUERY_THREADS', 8), thread_name_prefix='wallet-query')
+
+
+def call(function, *args, **kwargs):
+    """Calls the function on the current pool thread, counting its queries in the request's metrics."""
+    try:
+        with record_queries(current_metrics.get()):
+            return function(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(function, *args, **kwargs):
+    """Runs the function in the query pool, along with the context of the caller."""
+    return await sync_to_async(call, thread_sensitive=False, executor=executor)(function, *args, **kwargs)
@@ -0,0 +1,95 @@
+import hashlib
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from wallet.models import Transaction
+from wallet.services import CENTS
+
+
+# Fingerprints the transactions
+#
+# Two entries of a user with the same date, amount & name (ignoring case and
+# whitespace) share a fingerprint. The receiver in wallet/signals.py stamps
+# every Transaction saved through the ORM, while bulk paths that bypass the
+# model signals must call stamp() themselves, or run `manage.py fingerprints`.
+
+def normalize_name(name):
+    """Lowercases the name & collapses its whitespace."""
+    return " ".join(name.lower().split())
+
+
+def get_fingerprint(user_id, date, amount, name):
+    """Returns the fingerprint of an entry from its user, date, amount & name."""
+    amount = Decimal(amount).quantize(CENTS)
+    return hashlib.sha256(f"{user_id}|{date.isoformat()}|{amount}|{normalize_name(name)}".encode()).hexdigest()
+
+
+def stamp(entry):
+    """Sets the fingerprint of the entry from its current fields."""
+    entry.fingerprint = get_fingerprint(entry.user_id, entry.date, entry.amount, entry.name)
+    return entry.fingerprint
+
+
+# Looks up the duplicates through the (user, fingerprint) index
+
+def is_duplicate(user, date, amount, name, exclude=None):
+    """Checks if the user already has an entry with the same date, amount & name, other than the excluded one (e.g. the edited entry)."""
+    user_id = getattr(user, 'pk', user)
+    entries = Transaction.objects.filter(user_id=user_id, fingerprint=get_fingerprint(user_id, date, amount, name))
+    if exclude is not None:
+        entries = entries.exclude(pk=exclude)
+    return entries.exists()
+
+
+def find_existing(user, fingerprints, batch_size=500):
+    """Returns the fingerprints among the given ones that are already stored for the user."""
+    fingerprints = list(fingerprints)
+    existing = set()
+    for index in range(0, len(fingerprints), batch_size):
+        batch = fingerprints[index:index + batch_size]
+        existing.update(Transaction.objects.filter(user=user, fingerprint__in=batch).values_list('fingerprint', flat=True))
+    return existing
+
+
+def find_duplicates(users=None):
+    """Returns the fingerprints shared by several entries of a user, along with their no. of entries."""
+    entries = Transaction.objects.exclude(user=None).exclude(fingerprint="")
+    if users is not None:
+        entries = entries.filter(user__in=users)
+    return list(
+        entries.order_by()
+        .values('user', 'fingerprint')
+        .annotate(count=Count('id'), date=Max('date'), name=Min('name'), amount=Max('amount'))
+        .filter(count__gt=1)
+        .order_by('user', '-count')
+    )
+
+
+# Backfills the fingerprints of the existing transactions
+
+def backfill(users=None, missing_only=True, batch_size=1000):
+    """Computes the fingerprints of the transactions, returning the no. of updated entries."""
+    entries = Transaction.objects.exclude(user=None).only('id', 'user', 'date', 'amount', 'name', 'fingerprint')
+    if users is not None:
+        entries = entries.filter(user__in=users)
+    if missing_only:
+        entries = entries.filter(fingerprint="")
+
+    # Walks the entries by primary key, as the updates would disturb a running cursor
+    updated = 0
+    last = 0
+    with transaction.atomic():
+        while True:
+            batch = list(entries.filter(pk__gt=last).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            last = batch[-1].pk
+            changed = []
+            for entry in batch:
+                previous = entry.fingerprint
+                if stamp(entry) != previous:
+                    changed.append(entry)
+            updated += Transaction.objects.bulk_update(changed, ['fingerprint'])
+    return updated
@@ -1,29 +1,52 @@
 from django import forms
 
-from wallet.models import Category, Transaction, Type
+from budgeter.cache import get_reference
+from budgeter.forms import ReferenceChoiceField
+from wallet.duplicates import is_duplicate
+from wallet.models import Transaction
 
 
 class TransactionForm(forms.ModelForm):
-    type = forms.ModelChoiceField(queryset=Type.objects.all(), empty_label="Select type...", widget=forms.Select(attrs = {"class" : "form-select"}))
+    type = ReferenceChoiceField(empty_label="Select type...", widget=forms.Select(attrs = {"class" : "form-select"}))
     name = forms.CharField(widget=forms.TextInput(attrs = {"type": "text", "class": "form-control", "placeholder": "Name"}))
     amount = forms.DecimalField(min_value=0, max_digits=11, decimal_places=2, widget=forms.NumberInput(attrs = {"type": "number", "class": "form-control", "placeholder": "Amount"}))
     date = forms.DateField(widget=forms.DateInput(format='%m/%d/%Y', attrs = {"class": "form-control", "id": "input-date", "name": "input-date"}))
-    category = forms.ModelChoiceField(queryset=Type.objects.all(), empty_label="Select category...", widget=forms.Select(attrs = {"class" : "form-select"}))
+    category = ReferenceChoiceField(empty_label="Select category...", widget=forms.Select(attrs = {"class" : "form-select"}))
     note = forms.CharField(required=False, widget=forms.TextInput(attrs = {"type": "text", "class": "form-control", "placeholder": "Note"}))
+    duplicate = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs = {"class": "form-check-input"}))
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['category'].queryset = Category.objects.none()
+        # Owner of the entry, checked for duplicates (e.g. a double submit)
+        self.user = user
+        reference = get_reference()
+        self.fields['type'].objects = reference.types
 
         if 'type' in self.data:
-            try:
-                type_id = int(self.data.get('type'))
-                self.fields['category'].queryset = Category.objects.filter(type_id=type_id).order_by('name')
-            except (ValueError, TypeError):
-                pass
+            self.fields['category'].objects = reference.categories_for(self.data.get('type'))
         elif self.instance.pk:
-            self.fields['category'].queryset = self.instance.type.category_set.order_by('name')
+            self.fields['category'].objects = reference.categories_for(self.instance.type_id)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.user is not None and not self.errors and not cleaned_data.get('duplicate'):
+            if is_duplicate(self.user, cleaned_data['date'], cleaned_data['amount'], cleaned_data['name'], exclude=self.instance.pk):
+                raise forms.ValidationError("An entry with the same date, amount & name already exists.", code='duplicate')
+        return cleaned_data
 
     class Meta:
         model = Transaction
-        fields = ('type', 'name', 'amount', 'date',  'category', 'note')
\ No newline at end of file
+        fields = ('type', 'name', 'amount', 'date',  'category', 'note')
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs = {"class": "form-control", "accept": ".csv,.ofx,.qfx"}))
+    format = forms.ChoiceField(required=False, choices=(("", "Detect from the file name"), ("csv", "CSV"), ("ofx", "OFX")), widget=forms.Select(attrs = {"class" : "form-select"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        file = cleaned_data.get('file')
+        if file is not None and not cleaned_data.get('format'):
+            extension = file.name.rsplit('.', 1)[-1].lower()
+            cleaned_data['format'] = "ofx" if extension in ("ofx", "qfx") else "csv"
+        return cleaned_data
\ No newline at end of file
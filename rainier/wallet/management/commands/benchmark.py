@@ -0,0 +1,49 @@
+import datetime
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from wallet.benchmarks import SUITES
+
+
+class Command(BaseCommand):
+    help = "Runs the performance benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suites', nargs='*', help=f"Suites to run, among {', '.join(SUITES)} (defaults to all).")
+        parser.add_argument('--size', type=int, nargs='+', dest='sizes', help="No(s). of entries to run the suites with, each suite running once per size.")
+        parser.add_argument('--repeat', type=int, default=3, help="No. of runs per measurement, the best one is kept.")
+        parser.add_argument('--output', help="Path of a JSON file to write the results to, for comparing runs.")
+
+    def handle(self, *args, **options):
+        unknown = set(options['suites']) - set(SUITES)
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+        runs = []
+        for name in options['suites'] or SUITES:
+            for size in options['sizes'] or [None]:
+                kwargs = {"repeat": options['repeat']}
+                if size:
+                    kwargs["size"] = size
+                results = SUITES[name](**kwargs)
+                runs.append({"suite": name, "results": results})
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for key, value in results.items():
+                    self.stdout.write(f"  {key}: {value:.4f}" if isinstance(value, float) else f"  {key}: {value}")
+
+        if options['output']:
+            report = {
+                "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.display_name,
+                "repeat": options['repeat'],
+                "runs": runs,
+            }
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote the results to {options['output']}."))
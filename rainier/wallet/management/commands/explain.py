@@ -0,0 +1,89 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from budgeter.cache import get_reference
+from budgeter.models import Category
+from wallet.rollups import range_totals
+from wallet.services import finder, get_filters, paginate_entries
+from wallet.stats import compute_statistics
+
+# Search & filter criteria exercised by the dashboard and the finder
+QUERIES = {
+    "entries": {},
+    "type filter": {'input-type': 'Expense'},
+    "category filter": {'input-category': 'Groceries'},
+    "category search": {'input-category-search': 'groc'},
+    "date range": {'input-date': '01/01/2022 - 12/31/2022'},
+    "advanced filter": {'input-type-advanced': 'Expense', 'input-category-advanced': 'Groceries', 'input-date': '01/01/2022 - 12/31/2022'},
+    "search": {'input-search': 'rent'},
+}
+
+# Plan lines of a full table scan over the transactions or their rollups (SQLite's EXPLAIN QUERY PLAN)
+FULL_SCAN = re.compile(r"SCAN (TABLE )?wallet_(transaction|dailytotal|monthlytotal)\b(?! USING)")
+
+
+def capture_queries(function, *args):
+    """Returns the SQL of the queries run by the function, its parameters inlined."""
+    with CaptureQueriesContext(connection) as queries:
+        function(*args)
+    return [query['sql'] for query in queries.captured_queries]
+
+
+def explain_sql(sql):
+    """Returns the plan of the SQL query on the SQLite database."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = "Prints the EXPLAIN plans of the dashboard & finder queries and checks that they use the indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Runs the queries for the given user id (defaults to the first user).")
+        parser.add_argument('--check', action='store_true', help="Fails if any query scans the whole transactions or rollups table.")
+
+    def handle(self, *args, **options):
+        user = User.objects.get(pk=options['user']) if options['user'] else User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("There are no users to run the queries for.")
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"The plans are only checked on SQLite, not on {connection.vendor}.")
+
+        # The queries run by the views themselves: the first page of the
+        # listing, the range totals of a date filter & the dashboard statistics
+        # (the reference data being loaded beforehand, as it is cached)
+        get_reference()
+        categories_expenses, categories_income = Category.CategoryList(Category)
+        runs = []
+        for label, params in QUERIES.items():
+            request = RequestFactory().get('/', params)
+            request.user = user
+            runs.append((label, paginate_entries, finder(request)))
+            if set(params) == {'input-date'}:
+                runs.append((f"{label} (totals)", range_totals, user, *get_filters(request).date_range))
+        runs.append(("statistics", compute_statistics, user, categories_expenses))
+
+        full_scans = []
+        for label, function, *arguments in runs:
+            for index, sql in enumerate(capture_queries(function, *arguments), start=1):
+                name = f"{label} #{index}"
+                plan = explain_sql(sql)
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(sql)
+                self.stdout.write(plan)
+                if FULL_SCAN.search(plan):
+                    full_scans.append(name)
+
+        if full_scans:
+            message = f"Full table scan in: {', '.join(full_scans)}"
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("All queries use an index on wallet_transaction and its rollups."))
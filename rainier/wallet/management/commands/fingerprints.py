@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from wallet import duplicates
+from wallet.services import to_cents
+
+
+class Command(BaseCommand):
+    help = "Backfills the fingerprints of the transactions and reports the duplicate entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Limits the command to the given user id(s).")
+        parser.add_argument('--all', action='store_true', help="Recomputes every fingerprint rather than the missing ones.")
+
+    def handle(self, *args, **options):
+        count = duplicates.backfill(options['users'], missing_only=not options['all'])
+        self.stdout.write(f"Fingerprinted {count} entr{'y' if count == 1 else 'ies'}.")
+
+        groups = duplicates.find_duplicates(options['users'])
+        for group in groups:
+            self.stdout.write(f"User {group['user']}: {group['count']} x {group['date']} {group['name']!r} {to_cents(group['amount'])}")
+        if groups:
+            self.stdout.write(self.style.WARNING(f"Found {len(groups)} group(s) of duplicate entries."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No duplicate entries."))
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet.importer import IMPORT_BATCH_SIZE, PARSERS, import_entries
+
+
+class Command(BaseCommand):
+    help = "Imports the entries of a CSV or OFX statement for a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="Owner of the imported entries.")
+        parser.add_argument('path', help="Path of the statement.")
+        parser.add_argument('--format', choices=PARSERS, help="Format of the statement (defaults to the file extension).")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="No. of entries written per transaction.")
+        parser.add_argument('--allow-duplicates', action='store_true', help="Imports the rows matching existing entries as well.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['username']}")
+
+        statement_format = options['format'] or ("ofx" if options['path'].lower().endswith((".ofx", ".qfx")) else "csv")
+        with open(options['path'], 'rb') as file:
+            result = import_entries(user, PARSERS[statement_format](file), batch_size=options['batch_size'], skip_duplicates=not options['allow_duplicates'])
+
+        for line, error in result.errors:
+            self.stderr.write(f"Row {line}: {error}")
+        self.stdout.write(self.style.SUCCESS(str(result)))
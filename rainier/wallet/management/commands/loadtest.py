@@ -0,0 +1,50 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet.benchmarks import load_test, log_in
+
+
+class Command(BaseCommand):
+    help = "Measures the throughput & latency of a running server (WSGI or ASGI) at the given concurrency levels."
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Base URL of the server, e.g. http://127.0.0.1:8000.")
+        parser.add_argument('--username', required=True, help="User to log in as, e.g. one created by the seed command.")
+        parser.add_argument('--password', required=True, help="Password of the user.")
+        parser.add_argument('--path', action='append', dest='paths', help="Path(s) to request in turn (defaults to the dashboard).")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help="No(s). of concurrent clients.")
+        parser.add_argument('--requests', type=int, default=200, help="No. of requests per concurrency level.")
+        parser.add_argument('--output', help="Path of a JSON file to write the results to, for comparing servers.")
+
+    def handle(self, *args, **options):
+        url = options['url']
+        paths = options['paths'] or ["/"]
+        cookie = log_in(url, options['username'], options['password'])
+        if cookie is None:
+            raise CommandError(f"Could not log in to {url} as {options['username']}.")
+
+        # Warms up the server & its caches
+        load_test(url, paths, cookie, concurrency=1, requests=len(paths) * 2)
+
+        runs = []
+        for concurrency in options['concurrency']:
+            results = load_test(url, paths, cookie, concurrency, options['requests'])
+            runs.append(results)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{concurrency} client(s)"))
+            for key, value in results.items():
+                self.stdout.write(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+            if results['errors']:
+                self.stdout.write(self.style.ERROR(f"  {results['errors']} request(s) did not return a 200."))
+
+        if options['output']:
+            report = {
+                "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+                "url": url,
+                "paths": paths,
+                "runs": runs,
+            }
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote the results to {options['output']}."))
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import get_resolver, reverse
+
+from budgeter.cache import get_reference
+from wallet.benchmarks import get_finder_filters, scratch_user
+from wallet.models import Transaction
+from wallet.services import TYPE_EXPENSE
+
+# Sizes of the histories the budgets are checked against, the same budget
+# holding for every size
+BUDGET_SIZES = (100, 10000)
+
+# Requests exercising every URL, by URL name: method, query string or form
+# data, and the max. no. of SQL queries & of rows returned by the SELECTs
+# (None when the rows are not budgeted, e.g. an export streams all of them
+# and the trends load the whole history).
+# The figures include the session & user lookups of the middleware.
+BUDGETS = {
+    "signup": [("get", {}, 3, 5)],
+    "configure": [("get", {}, 4, 5)],
+    "login": [("get", {}, 3, 5)],
+    "account": [("get", {}, 4, 5), ("post", "account", 5, 5)],
+    "preferences": [("get", {}, 4, 5)],
+    "home": [("get", {}, 7, 200)] + [("get", filters, 7, 200) for filters in get_finder_filters().values()],
+    "entries": [("get", {}, 6, 200), ("get", "cursor", 6, 200)],
+    "entries_explain": [("get", {}, 5, 5)],
+    "export": [("get", {"format": "csv"}, 5, None), ("get", {"format": "json"}, 5, None)],
+    "create": [("get", {}, 4, 5), ("post", "entry", 17, 10)],
+    "import": [("get", {}, 4, 5)],
+    "edit": [("get", {}, 5, 5), ("post", "entry", 21, 10)],
+    "delete": [("get", {}, 5, 5), ("post", {}, 15, 10)],
+    "ajax_categories": [("get", {"type_id": TYPE_EXPENSE}, 1, 5)],
+    "stats_balance": [("get", {}, 7, 120)],
+    "stats_categories": [("get", {}, 7, 120)],
+    "stats_months": [("get", {}, 7, 120)],
+    "stats_days": [("get", {}, 7, 120)],
+    "stats_trends": [("get", {}, 4, None)],
+    "metrics": [("get", {}, 2, 5)],
+    "logout": [("get", {}, 4, 5)],
+}
+
+# URLs of third-party apps, not budgeted
+IGNORED_PREFIXES = ('admin/',)
+
+
+class QueryCounter:
+    """Counts the SQL queries run on the connection and the rows returned by the SELECTs."""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.counting = False
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if self.counting:
+            return result
+        self.queries += 1
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            # Counts the rows the query returns with a query of its own
+            self.counting = True
+            try:
+                with context['connection'].cursor() as cursor:
+                    cursor.execute(f"SELECT COUNT(*) FROM ({sql}) counted", params)
+                    self.rows += cursor.fetchone()[0]
+            finally:
+                self.counting = False
+        return result
+
+
+class Command(BaseCommand):
+    help = "Checks the no. of SQL queries & of rows fetched by every URL against its budget, for several history sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, nargs='+', dest='sizes', help=f"History sizes to check (defaults to {' & '.join(map(str, BUDGET_SIZES))}).")
+
+    def handle(self, *args, **options):
+        names = {pattern.name for pattern in get_resolver().url_patterns if not str(pattern.pattern).startswith(IGNORED_PREFIXES)}
+        missing = names - set(BUDGETS)
+        if missing:
+            raise CommandError(f"No query budget for the URL(s): {', '.join(sorted(missing))}")
+
+        failures = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for size in options['sizes'] or BUDGET_SIZES:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{size} entries"))
+                with scratch_user(size) as user:
+                    for label, queries, rows, max_queries, max_rows in self.run_requests(user):
+                        over = queries > max_queries or (max_rows is not None and rows > max_rows)
+                        line = f"  {label}: {queries}/{max_queries} queries, {rows}/{max_rows if max_rows is not None else '-'} rows"
+                        self.stdout.write(self.style.ERROR(line) if over else line)
+                        if over:
+                            failures.append(f"{label} ({size} entries)")
+
+        if failures:
+            raise CommandError(f"Over budget: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Every URL is within its query budget."))
+
+    def run_requests(self, user):
+        """Requests every URL as the user, yielding the queries & rows counted for each."""
+        reference = get_reference()
+        client = Client()
+        entry = Transaction.objects.filter(user=user).order_by('-date').first()
+        category = reference.categories_for(TYPE_EXPENSE)[0]
+        data = {
+            "entry": {"type": TYPE_EXPENSE, "name": "Budget", "amount": "12.34", "date": f"{entry.date:%m/%d/%Y}", "category": category.pk, "note": "budget", "duplicate": "on"},
+            "account": {"username": user.username, "first_name": "Budget", "last_name": "", "email": ""},
+            "cursor": {"before": entry.date.isoformat()},
+        }
+
+        for name, requests in BUDGETS.items():
+            kwargs = {"pk": entry.pk} if name in ("edit", "delete") else {}
+            path = reverse(name, kwargs=kwargs)
+            for method, params, max_queries, max_rows in requests:
+                params = data[params] if isinstance(params, str) else params
+                client.force_login(user)
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    response = getattr(client, method)(path, params)
+                    # Consumes the streamed responses within the counter
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                if response.status_code >= 400:
+                    raise CommandError(f"{method.upper()} {path} returned {response.status_code}")
+                label = f"{method.upper()} {path}{'?' + '&'.join(f'{key}={value}' for key, value in params.items()) if params and method == 'get' else ''}"
+                yield label, counter.queries, counter.rows, max_queries, max_rows
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authenticator import versions
+from wallet import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds or verifies the daily & monthly transaction rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Reports the differences instead of rebuilding.")
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Limits the command to the given user id(s).")
+
+    def handle(self, *args, **options):
+        users = options['users']
+
+        if options['verify']:
+            differences = rollups.verify(users)
+            for model, key, expected, actual in differences:
+                self.stdout.write(f"{model} {key}: expected {expected}, stored {actual}")
+            if differences:
+                raise CommandError(f"{len(differences)} rollup row(s) are out of sync.")
+            self.stdout.write(self.style.SUCCESS("Rollups are in sync."))
+            return
+
+        daily, monthly = rollups.rebuild(users)
+        # Discards the statistics cached from the previous rollups
+        versions.bump(users)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {daily} daily and {monthly} monthly rollup row(s)."))
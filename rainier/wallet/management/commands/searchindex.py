@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from wallet import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search index of the transaction names & notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Limits the command to the given user id(s).")
+
+    def handle(self, *args, **options):
+        count = search.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} search token(s)."))
@@ -0,0 +1,33 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet import seed
+
+
+class Command(BaseCommand):
+    help = "Generates users with realistic, reproducible histories of entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1, help="No. of users to generate.")
+        parser.add_argument('--entries', type=int, default=100000, help="No. of entries per user.")
+        parser.add_argument('--days', type=int, default=730, help="No. of days covered by each history.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the generator, the same seed generates the same histories.")
+        parser.add_argument('--prefix', default="seed", help="Prefix of the generated usernames.")
+        parser.add_argument('--password', help="Password of the generated users (unusable by default).")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users prefixed with {prefix!r} already exist, pick another --prefix.")
+
+        start = time.perf_counter()
+        users = seed.create_users(options['users'], prefix, options['password'])
+        for index, user in enumerate(users, start=1):
+            seed.populate(user, options['entries'], f"{options['seed']}:{index}", options['days'])
+            self.stdout.write(f"Generated {options['entries']} entries for {user.username}.")
+
+        elapsed = time.perf_counter() - start
+        total = options['users'] * options['entries']
+        self.stdout.write(self.style.SUCCESS(f"Generated {total} entries in {elapsed:.1f}s ({total / elapsed:.0f} entries/s)."))
@@ -0,0 +1,89 @@
+# Generated by Django 4.0.6 on 2026-10-18 19:34
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('budgeter', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(default=django.utils.timezone.localtime)),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('name', models.CharField(max_length=50)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budgeter.category')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budgeter.type')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transaction',
+                'verbose_name_plural': 'Transactions',
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budgeter.category')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budgeter.type')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Monthly total',
+                'verbose_name_plural': 'Monthly totals',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily total',
+                'verbose_name_plural': 'Daily totals',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date', '-amount', 'name'], name='transaction_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'date'], name='transaction_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'category', 'date'], name='transaction_user_category_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlytotal',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'type', 'category'), name='unique_monthly_total'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytotal',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_total'),
+        ),
+    ]
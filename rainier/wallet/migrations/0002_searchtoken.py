@@ -0,0 +1,49 @@
+# Generated by Django 4.0.6 on 2026-10-18 19:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_notes(apps, schema_editor):
+    """Indexes the notes of the existing transactions."""
+    Transaction = apps.get_model('wallet', 'Transaction')
+    SearchToken = apps.get_model('wallet', 'SearchToken')
+    entries = Transaction.objects.exclude(user=None).exclude(note="").values_list('id', 'user_id', 'note')
+    SearchToken.objects.bulk_create(
+        (
+            SearchToken(user_id=user_id, transaction_id=pk, token=token)
+            for pk, user_id, note in entries.iterator()
+            for token in set(note.lower().split())
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wallet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='wallet.transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Search token',
+                'verbose_name_plural': 'Search tokens',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['user', 'token'], name='searchtoken_user_token_idx'),
+        ),
+        migrations.RunPython(index_notes, migrations.RunPython.noop),
+    ]
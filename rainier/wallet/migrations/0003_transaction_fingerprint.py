@@ -0,0 +1,37 @@
+# Generated by Django 4.0.6 on 2026-10-18 19:48
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def fingerprint_entries(apps, schema_editor):
+    """Fingerprints the existing transactions."""
+    Transaction = apps.get_model('wallet', 'Transaction')
+    entries = list(Transaction.objects.exclude(user=None).only('id', 'user', 'date', 'amount', 'name'))
+    for entry in entries:
+        amount = Decimal(entry.amount).quantize(Decimal('0.01'))
+        name = " ".join(entry.name.lower().split())
+        entry.fingerprint = hashlib.sha256(f"{entry.user_id}|{entry.date.isoformat()}|{amount}|{name}".encode()).hexdigest()
+    Transaction.objects.bulk_update(entries, ['fingerprint'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_searchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'fingerprint'], name='transaction_user_print_idx'),
+        ),
+        migrations.RunPython(fingerprint_entries, migrations.RunPython.noop),
+    ]
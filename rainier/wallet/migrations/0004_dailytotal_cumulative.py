@@ -0,0 +1,42 @@
+# Generated by Django 4.0.6 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+def accumulate_totals(apps, schema_editor):
+    """Computes the running totals of the existing daily rollups."""
+    DailyTotal = apps.get_model('wallet', 'DailyTotal')
+    rows = list(DailyTotal.objects.order_by('user', 'date'))
+    user_id, count, expenses, income = None, 0, 0, 0
+    for row in rows:
+        if row.user_id != user_id:
+            user_id, count, expenses, income = row.user_id, 0, 0, 0
+        count, expenses, income = count + row.count, expenses + row.expenses, income + row.income
+        row.cumulative_count, row.cumulative_expenses, row.cumulative_income = count, expenses, income
+    DailyTotal.objects.bulk_update(rows, ['cumulative_count', 'cumulative_expenses', 'cumulative_income'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0003_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailytotal',
+            name='cumulative_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailytotal',
+            name='cumulative_expenses',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=17),
+        ),
+        migrations.AddField(
+            model_name='dailytotal',
+            name='cumulative_income',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=17),
+        ),
+        migrations.RunPython(accumulate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0.6 on 2026-10-18 21:05
+
+from django.db import migrations
+
+
+def index_entries(apps, fields):
+    """Replaces the search tokens with the words of the given fields of the existing transactions."""
+    Transaction = apps.get_model('wallet', 'Transaction')
+    SearchToken = apps.get_model('wallet', 'SearchToken')
+    SearchToken.objects.all().delete()
+    entries = Transaction.objects.exclude(user=None).values_list('id', 'user_id', *fields)
+    SearchToken.objects.bulk_create(
+        (
+            SearchToken(user_id=user_id, transaction_id=pk, token=token)
+            for pk, user_id, *texts in entries.iterator()
+            for token in set(" ".join(texts).lower().split())
+        ),
+        batch_size=1000,
+    )
+
+
+def index_names(apps, schema_editor):
+    """Indexes the names of the existing transactions along with their notes."""
+    index_entries(apps, ('name', 'note'))
+
+
+def index_notes(apps, schema_editor):
+    """Indexes the notes of the existing transactions only."""
+    index_entries(apps, ('note',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0004_dailytotal_cumulative'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_names, index_notes),
+    ]
@@ -24,6 +24,8 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=11, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     note = models.CharField(max_length=255, blank=True)
+    # Hash of the user, date, amount & normalized name (see wallet/duplicates.py)
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.user} - {self.date} - {self.category}, {self.type} - {self.name}, {self.amount}USD"
@@ -46,4 +48,89 @@ class Transaction(models.Model):
 
     class Meta:
         verbose_name = 'Transaction'
-        verbose_name_plural = 'Transactions'
\ No newline at end of file
+        verbose_name_plural = 'Transactions'
+        # Matches the access paths of the entry listing (user, ordered by date,
+        # amount & name), of the type, category & date range filters and of
+        # the duplicate checks. Fingerprints are not unique, as the same
+        # purchase may legitimately happen twice a day.
+        indexes = [
+            models.Index(fields=['user', '-date', '-amount', 'name'], name='transaction_user_date_idx'),
+            models.Index(fields=['user', 'type', 'date'], name='transaction_user_type_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='transaction_user_category_idx'),
+            models.Index(fields=['user', 'fingerprint'], name='transaction_user_print_idx'),
+        ]
+
+class DailyTotal(models.Model):
+    """
+    Represents the rollup of the user's entries for a single day.
+
+    Rows are maintained incrementally on every transaction write
+    (see wallet/rollups.py) and can be rebuilt from scratch with
+    the `rollups` management command. The cumulative fields hold the
+    running totals of the user's entries up to & including the day,
+    so that the totals of any date range take two row lookups.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+    expenses = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    income = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    cumulative_count = models.IntegerField(default=0)
+    cumulative_expenses = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    cumulative_income = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.user} - {self.date} - {self.count} entries, -{self.expenses} +{self.income}"
+
+    class Meta:
+        verbose_name = 'Daily total'
+        verbose_name_plural = 'Daily totals'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_total'),
+        ]
+
+
+class MonthlyTotal(models.Model):
+    """
+    Represents the rollup of the user's entries for a single month,
+    type and category. The month is stored as its first day.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()
+    type = models.ForeignKey(Type, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%B %Y} - {self.category}, {self.type} - {self.count} entries, {self.amount}"
+
+    class Meta:
+        verbose_name = 'Monthly total'
+        verbose_name_plural = 'Monthly totals'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'type', 'category'], name='unique_monthly_total'),
+        ]
+
+
+class SearchToken(models.Model):
+    """
+    Represents a word of a transaction name or note, lowercased, forming
+    an inverted index of the names & notes scoped per user.
+
+    Tokens are kept in sync on every transaction write (see wallet/search.py)
+    and can be rebuilt from scratch with the `searchindex` management command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE)
+    token = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f"{self.user} - {self.token}"
+
+    class Meta:
+        verbose_name = 'Search token'
+        verbose_name_plural = 'Search tokens'
+        indexes = [
+            models.Index(fields=['user', 'token'], name='searchtoken_user_token_idx'),
+        ]
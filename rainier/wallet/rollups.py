@@ -0,0 +1,313 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from wallet.models import DailyTotal, MonthlyTotal, Transaction
+from wallet.services import TYPE_EXPENSE, TYPE_INCOME, to_cents
+
+# Fields of a transaction that contribute to the rollups
+ROLLUP_FIELDS = ('user_id', 'date', 'type_id', 'category_id', 'amount')
+
+# Min. no. of rollup rows changed at once (e.g. by an import) for which the
+# rows are read & written in bulk rather than updated one by one
+BULK_THRESHOLD = 10
+
+# Fields of the daily rollups & of their running totals, in the same order
+DAILY_FIELDS = ('count', 'expenses', 'income')
+CUMULATIVE_FIELDS = ('cumulative_count', 'cumulative_expenses', 'cumulative_income')
+
+
+# Maintains the rollups incrementally
+#
+# The receivers in wallet/signals.py keep the rollups in sync for every
+# Transaction saved or deleted through the ORM (views, admin, fixtures).
+# Bulk paths that bypass the model signals (bulk_create, QuerySet.update)
+# must call record() themselves, or run `manage.py rollups` afterwards.
+
+def get_state(entry):
+    """Returns the fields of the entry that contribute to the rollups."""
+    return tuple(getattr(entry, field) for field in ROLLUP_FIELDS)
+
+
+def record(states, sign=1):
+    """Adds the entries to the rollups, or removes them with a negative sign."""
+    apply_changes((state, sign) for state in states)
+
+
+def apply_changes(changes):
+    """Applies the (state, sign) pairs to the daily & monthly rollups."""
+    pending = RollupChanges()
+    pending.add(changes)
+    pending.apply()
+
+
+class RollupChanges:
+    """
+    Accumulates the changes of the daily & monthly rollups, so that bulk
+    writers (e.g. the import, over all its batches) apply them at once.
+    """
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: [0, 0, 0])
+        self.monthly = defaultdict(lambda: [0, 0])
+
+    def add(self, changes):
+        """Adds the (state, sign) pairs to the pending changes."""
+        for (user_id, date, type_id, category_id, amount), sign in changes:
+            if user_id is None:
+                continue
+            totals_daily = self.daily[(user_id, date)]
+            totals_daily[0] += sign
+            if type_id == TYPE_EXPENSE:
+                totals_daily[1] += sign * amount
+            elif type_id == TYPE_INCOME:
+                totals_daily[2] += sign * amount
+            totals_monthly = self.monthly[(user_id, date.replace(day=1), type_id, category_id)]
+            totals_monthly[0] += sign
+            totals_monthly[1] += sign * amount
+
+    def apply(self):
+        """Applies the pending changes to the rollups, along with their running totals."""
+        daily = {key: {"count": count, "expenses": expenses, "income": income} for key, (count, expenses, income) in self.daily.items()}
+        monthly = {key: {"count": count, "amount": amount} for key, (count, amount) in self.monthly.items()}
+        with transaction.atomic():
+            for model, key_fields, totals in (
+                (DailyTotal, ("user_id", "date"), daily),
+                (MonthlyTotal, ("user_id", "month", "type_id", "category_id"), monthly),
+            ):
+                if len(totals) > BULK_THRESHOLD:
+                    apply_totals_bulk(model, key_fields, totals)
+                else:
+                    for key, values in totals.items():
+                        apply_totals(model, dict(zip(key_fields, key)), values)
+            apply_cumulative(daily)
+        self.daily.clear()
+        self.monthly.clear()
+
+
+def apply_totals(model, lookup, values):
+    """Adds the values to the matching rollup row, creating or pruning it when needed."""
+    if not any(values.values()):
+        return
+    changes = {field: F(field) + value for field, value in values.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        if values["count"] < 0:
+            model.objects.filter(**lookup, count__lte=0).delete()
+        return
+    # Nothing to remove from a row that does not exist (e.g. cascading deletes)
+    if values["count"] <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **values)
+    except IntegrityError:
+        # The row was created concurrently
+        model.objects.filter(**lookup).update(**changes)
+
+
+def apply_totals_bulk(model, key_fields, totals, batch_size=500):
+    """Adds the values to the matching rollup rows with a fixed no. of queries."""
+    user_ids = {key[0] for key in totals}
+    dates = [key[1] for key in totals]
+    rows = model.objects.select_for_update().filter(
+        user_id__in=user_ids,
+        **{f"{key_fields[1]}__range": [min(dates), max(dates)]},
+    )
+    existing = {tuple(getattr(row, field) for field in key_fields): row for row in rows}
+
+    created, updated, deleted = [], [], []
+    for key, values in totals.items():
+        row = existing.get(key)
+        if row is None:
+            if values["count"] > 0:
+                created.append(model(**dict(zip(key_fields, key)), **values))
+            continue
+        for field, value in values.items():
+            setattr(row, field, getattr(row, field) + value)
+        (updated if row.count > 0 else deleted).append(row)
+
+    model.objects.bulk_create(created, batch_size=batch_size)
+    model.objects.bulk_update(updated, list(next(iter(totals.values()))), batch_size=batch_size)
+    model.objects.filter(pk__in=[row.pk for row in deleted]).delete()
+
+
+# Maintains the running totals of the daily rollups
+#
+# A change on a given day shifts the running totals of every later day of the
+# user, which costs a single UPDATE, while the row of the day itself gets the
+# running totals of the previous row plus its own. The running totals of the
+# days changed by a bulk write (e.g. an import) are recomputed in a single pass.
+
+def apply_cumulative(daily):
+    """Carries the changes of the daily rollups over to the running totals."""
+    if len(daily) > BULK_THRESHOLD:
+        since = {}
+        for user_id, date in daily:
+            since[user_id] = min(date, since.get(user_id, date))
+        for user_id, date in since.items():
+            rebuild_cumulative(user_id, date)
+        return
+
+    # Days in order, so that each row builds on the running totals of the previous one
+    for (user_id, date), values in sorted(daily.items(), key=lambda item: item[0][1]):
+        if not any(values.values()):
+            continue
+        DailyTotal.objects.filter(user_id=user_id, date__gt=date).update(**{
+            cumulative: F(cumulative) + values[field] for field, cumulative in zip(DAILY_FIELDS, CUMULATIVE_FIELDS)
+        })
+        previous = DailyTotal.objects.filter(user_id=user_id, date__lt=date).order_by('-date')
+        DailyTotal.objects.filter(user_id=user_id, date=date).update(**{
+            cumulative: F(field) + Coalesce(Subquery(previous.values(cumulative)[:1]), 0, output_field=DailyTotal._meta.get_field(cumulative))
+            for field, cumulative in zip(DAILY_FIELDS, CUMULATIVE_FIELDS)
+        })
+
+
+def rebuild_cumulative(user_id, since=None, batch_size=500):
+    """Recomputes the running totals of the user's daily rollups, from the given day onwards."""
+    rows = DailyTotal.objects.filter(user_id=user_id).order_by('date')
+    running = (0, 0, 0)
+    if since is not None:
+        running = rows.filter(date__lt=since).values_list(*CUMULATIVE_FIELDS).last() or running
+        rows = rows.filter(date__gte=since)
+
+    updated = []
+    for row in rows.only('id', *DAILY_FIELDS, *CUMULATIVE_FIELDS):
+        running = tuple(total + getattr(row, field) for total, field in zip(running, DAILY_FIELDS))
+        if tuple(getattr(row, cumulative) for cumulative in CUMULATIVE_FIELDS) != running:
+            for cumulative, total in zip(CUMULATIVE_FIELDS, running):
+                setattr(row, cumulative, total)
+            updated.append(row)
+    DailyTotal.objects.bulk_update(updated, CUMULATIVE_FIELDS, batch_size=batch_size)
+
+
+def accumulate(daily):
+    """Sets the running totals of the computed daily rollups, sorting them by user & day."""
+    daily.sort(key=lambda row: (row.user_id, row.date))
+    user_id, running = None, (0, 0, 0)
+    for row in daily:
+        if row.user_id != user_id:
+            user_id, running = row.user_id, (0, 0, 0)
+        running = tuple(total + getattr(row, field) for total, field in zip(running, DAILY_FIELDS))
+        for cumulative, total in zip(CUMULATIVE_FIELDS, running):
+            setattr(row, cumulative, total)
+    return daily
+
+
+# Reads the rollups of the user
+
+def rollup_balance(user):
+    """Returns the total amount of the user's entries per type."""
+    totals = MonthlyTotal.objects.filter(user=user).order_by().values('type').annotate(total=Sum('amount'))
+    return {row['type']: to_cents(row['total']) for row in totals}
+
+
+def rollup_monthly(user, start_date, end_date):
+    """Returns the total amount of the user's entries per month & type within the date range."""
+    totals = (
+        MonthlyTotal.objects.filter(user=user, month__range=[start_date, end_date])
+        .order_by()
+        .values('month', 'type')
+        .annotate(total=Sum('amount'))
+    )
+    return {(row['month'], row['type']): to_cents(row['total']) for row in totals}
+
+
+def rollup_categories(user, start_date, end_date):
+    """Returns the total expenses of the user per category within the date range."""
+    totals = (
+        MonthlyTotal.objects.filter(user=user, type=TYPE_EXPENSE, month__range=[start_date, end_date])
+        .order_by()
+        .values('category')
+        .annotate(total=Sum('amount'))
+    )
+    return {row['category']: to_cents(row['total']) for row in totals}
+
+
+def rollup_daily(user, start_date=None, end_date=None):
+    """Returns the no. of entries & the net amount of the user per day, latest first."""
+    totals = DailyTotal.objects.filter(user=user)
+    if start_date is not None and end_date is not None:
+        totals = totals.filter(date__range=[start_date, end_date])
+    totals = totals.order_by('-date').values_list('date', 'count', 'expenses', 'income')
+    return {date: [count, income - expenses] for date, count, expenses, income in totals}
+
+
+def range_totals(user, start_date, end_date):
+    """
+    Returns the no. of entries, the expenses, the income & the net amount
+    of the user within the date range (both ends included), as the
+    difference between the running totals at both ends of the range.
+    """
+    rows = DailyTotal.objects.filter(user=user).order_by('-date')
+    # The last rows on or before the end & before the start of the range, fetched together
+    last_end = Subquery(rows.filter(date__lte=end_date).values('pk')[:1])
+    last_start = Subquery(rows.filter(date__lt=start_date).values('pk')[:1])
+    boundaries = list(rows.filter(Q(pk=last_end) | Q(pk=last_start)).values_list('date', *CUMULATIVE_FIELDS))
+
+    # Latest first: both are the same row when no day of the range has entries
+    end = boundaries[0][1:] if boundaries else (0, 0, 0)
+    start = next((row[1:] for row in boundaries if row[0] < start_date), (0, 0, 0))
+    count = end[0] - start[0]
+    expenses, income = to_cents(end[1] - start[1]), to_cents(end[2] - start[2])
+    return {"count": count, "expenses": expenses, "income": income, "net": income - expenses}
+
+
+# Rebuilds & verifies the rollups from the raw transactions
+
+def compute_rollups(users=None):
+    """Computes the daily & monthly rollup rows from the transactions."""
+    entries = Transaction.objects.exclude(user=None).order_by()
+    if users is not None:
+        entries = entries.filter(user__in=users)
+
+    daily = [
+        DailyTotal(user_id=row['user'], date=row['date'], count=row['count'], expenses=to_cents(row['expenses'] or 0), income=to_cents(row['income'] or 0))
+        for row in entries.values('user', 'date').annotate(
+            count=Count('id'),
+            expenses=Sum('amount', filter=Q(type=TYPE_EXPENSE)),
+            income=Sum('amount', filter=Q(type=TYPE_INCOME)),
+        )
+    ]
+    monthly = [
+        MonthlyTotal(user_id=row['user'], month=row['month'], type_id=row['type'], category_id=row['category'], count=row['count'], amount=to_cents(row['amount']))
+        for row in entries.annotate(month=TruncMonth('date')).values('user', 'month', 'type', 'category').annotate(
+            count=Count('id'),
+            amount=Sum('amount'),
+        )
+    ]
+    return accumulate(daily), monthly
+
+
+def rebuild(users=None, batch_size=1000):
+    """Replaces the stored rollups with the ones computed from the transactions."""
+    daily, monthly = compute_rollups(users)
+    with transaction.atomic():
+        for model in (DailyTotal, MonthlyTotal):
+            stored = model.objects.all()
+            if users is not None:
+                stored = stored.filter(user__in=users)
+            stored.delete()
+        DailyTotal.objects.bulk_create(daily, batch_size=batch_size)
+        MonthlyTotal.objects.bulk_create(monthly, batch_size=batch_size)
+    return len(daily), len(monthly)
+
+
+def verify(users=None):
+    """Returns the differences between the stored and the computed rollups."""
+    daily, monthly = compute_rollups(users)
+    differences = []
+    for model, computed, key, values in (
+        (DailyTotal, daily, ('user_id', 'date'), DAILY_FIELDS + CUMULATIVE_FIELDS),
+        (MonthlyTotal, monthly, ('user_id', 'month', 'type_id', 'category_id'), ('count', 'amount')),
+    ):
+        stored = model.objects.all()
+        if users is not None:
+            stored = stored.filter(user__in=users)
+        expected = {tuple(getattr(row, field) for field in key): tuple(getattr(row, field) for field in values) for row in computed}
+        actual = {row[:len(key)]: row[len(key):] for row in stored.values_list(*key, *values)}
+        for row_key in sorted(expected.keys() | actual.keys(), key=str):
+            if expected.get(row_key) != actual.get(row_key):
+                differences.append((model.__name__, row_key, expected.get(row_key), actual.get(row_key)))
+    return differences
@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from wallet.models import SearchToken, Transaction
+
+
+# Maintains the inverted index of the transaction names & notes
+#
+# The receivers in wallet/signals.py re-index every Transaction saved
+# through the ORM, while the tokens of deleted transactions cascade.
+# Bulk paths that bypass the model signals must call index_entries().
+# Types & categories are not indexed: the finder resolves their names
+# against the reference data (see wallet/services.py).
+
+def tokenize(text):
+    """Splits the text into its distinct lowercase words."""
+    return set(text.lower().split())
+
+
+def build_tokens(entries):
+    """Builds the (unsaved) search tokens of the entries' names & notes."""
+    return [
+        SearchToken(user_id=entry.user_id, transaction_id=entry.pk, token=token)
+        for entry in entries
+        if entry.user_id is not None
+        for token in tokenize(f"{entry.name} {entry.note}")
+    ]
+
+
+def index_entries(entries, batch_size=1000):
+    """Replaces the search tokens of the entries."""
+    entries = list(entries)
+    with transaction.atomic():
+        SearchToken.objects.filter(transaction__in=[entry.pk for entry in entries]).delete()
+        SearchToken.objects.bulk_create(build_tokens(entries), batch_size=batch_size)
+
+
+def rebuild(users=None, batch_size=1000):
+    """Rebuilds the search tokens from the transaction names & notes."""
+    entries = Transaction.objects.exclude(user=None).only('id', 'user', 'name', 'note')
+    tokens = SearchToken.objects.all()
+    if users is not None:
+        entries = entries.filter(user__in=users)
+        tokens = tokens.filter(user__in=users)
+    with transaction.atomic():
+        tokens.delete()
+        created = SearchToken.objects.bulk_create(build_tokens(entries.iterator(chunk_size=batch_size)), batch_size=batch_size)
+    return len(created)
+
+
+# Looks up the index
+#
+# A word matches the tokens it starts with, looked up as a range of the
+# (user, token) index: the upper bound follows the last character of the
+# word, which holds for the bytewise collations of SQLite & of PostgreSQL
+# with the "C" collation.
+
+def match_word(user, word):
+    """Returns the ids of the user's entries with a word starting with the given one, as a subquery."""
+    word = word.lower()
+    return SearchToken.objects.filter(user=user, token__gte=word, token__lt=word[:-1] + chr(ord(word[-1]) + 1)).values('transaction_id')
@@ -0,0 +1,132 @@
+import datetime
+import math
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils.timezone import localtime
+
+from authenticator import versions
+from authenticator.models import Profile
+from budgeter.cache import get_reference
+from wallet import duplicates, rollups, search
+from wallet.models import Transaction
+from wallet.services import TYPE_EXPENSE, TYPE_INCOME
+
+# No. of entries generated & written at once
+SEED_CHUNK_SIZE = 10000
+
+# Share of the entries that are income
+INCOME_SHARE = 0.08
+
+# Share of the entries that carry a note
+NOTE_SHARE = 0.2
+
+# Merchants, median amount & spread (of the log-normal amounts) per category,
+# the categories being picked with a Zipf-like skew (first ones most often)
+CATEGORY_PROFILES = {
+    "Groceries": (("Supermarket", "Corner Shop", "Bakery", "Butcher", "Farmers Market"), 35, 0.6),
+    "Dining": (("Coffee", "Pizzeria", "Sushi Bar", "Burger Joint", "Food Truck"), 18, 0.7),
+    "Transportation": (("Metro", "Gas Station", "Taxi", "Parking", "Bike Share"), 12, 0.8),
+    "Entertainment": (("Cinema", "Streaming", "Concert", "Bookstore", "Museum"), 25, 0.9),
+    "Utilities": (("Electricity", "Water", "Internet", "Phone", "Gas"), 60, 0.4),
+    "Miscellaneous": (("Pharmacy", "Hardware Store", "Gift Shop", "Post Office", "Laundry"), 20, 1.0),
+    "Medical": (("Clinic", "Dentist", "Pharmacy", "Optician", "Lab"), 80, 0.9),
+    "Housing": (("Rent", "Home Insurance", "Repairs", "Furniture", "Cleaning"), 400, 1.0),
+    "Travel": (("Airline", "Hotel", "Car Rental", "Train", "Travel Agency"), 250, 0.8),
+    "Education": (("Tuition", "Online Course", "Books", "Workshop", "Supplies"), 120, 0.9),
+    "Salary": (("Employer",), 3000, 0.2),
+    "Additional": (("Refund", "Freelance", "Gift", "Cashback", "Sale"), 150, 1.0),
+    "Savings": (("Interest", "Dividends", "Savings Transfer"), 80, 0.8),
+}
+
+# Max. generated amount
+AMOUNT_MAX = 99999999
+
+# Fields of the generated entries, in the order of their tuples
+SEED_FIELDS = ('user', 'date', 'type', 'category', 'name', 'amount', 'note', 'fingerprint')
+
+# Words of the generated notes
+NOTE_WORDS = ("weekly", "monthly", "shared", "gift", "work", "family", "trip", "urgent", "online", "cash", "card", "refund", "birthday", "holiday", "subscription")
+
+
+# Generates the entries
+#
+# Dates lean towards the recent past, with twice the average density
+# today. The categories and merchants follow a Zipf-like distribution and
+# the amounts a log-normal one, so that the generated histories look like
+# real ones to the indexes & the planner. The entries are written with raw
+# inserts, then the rollups & search tokens of the user are rebuilt from
+# them.
+
+def zipf_weights(count, exponent=1.1):
+    """Returns the Zipf-like weights of the given no. of ranks."""
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def generate_entries(user, size, rng, days=730, today=None):
+    """Yields the given no. of generated entries of the user, as tuples of the SEED_FIELDS."""
+    reference = get_reference()
+    today = today or datetime.date.today()
+
+    profiles = {}
+    for type_id in (TYPE_EXPENSE, TYPE_INCOME):
+        categories = [category for category in reference.categories_for(type_id) if category.name in CATEGORY_PROFILES]
+        # Each user favours different categories
+        rng.shuffle(categories)
+        profiles[type_id] = (categories, zipf_weights(len(categories)))
+    merchant_weights = {name: zipf_weights(len(merchants)) for name, (merchants, median, spread) in CATEGORY_PROFILES.items()}
+
+    for _ in range(size):
+        type_id = TYPE_INCOME if rng.random() < INCOME_SHARE else TYPE_EXPENSE
+        categories, weights = profiles[type_id]
+        category = rng.choices(categories, weights)[0]
+        merchants, median, spread = CATEGORY_PROFILES[category.name]
+
+        date = today - datetime.timedelta(days=int(days * (1 - math.sqrt(rng.random()))))
+        name = rng.choices(merchants, merchant_weights[category.name])[0]
+        amount = Decimal(f"{min(rng.lognormvariate(math.log(median), spread), AMOUNT_MAX):.2f}")
+        note = " ".join(rng.sample(NOTE_WORDS, rng.randint(1, 3))) if rng.random() < NOTE_SHARE else ""
+        yield (user.pk, date, type_id, category.pk, name, amount, note, duplicates.get_fingerprint(user.pk, date, amount, name))
+
+
+def populate(user, size, seed=0, days=730, chunk_size=SEED_CHUNK_SIZE):
+    """
+    Writes the given no. of generated entries for the user, along with
+    their rollups & search tokens. The same seed (an int or a str) always
+    generates the same entries.
+    """
+    rng = random.Random(seed)
+    entries = generate_entries(user, size, rng, days)
+
+    # Skips the per-value preparation of bulk_create(), the bulk of its cost
+    # for millions of rows: the generated values are already in their
+    # database form, apart from the creation time, adapted once.
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(Transaction._meta.get_field(field).column) for field in ("created", *SEED_FIELDS))
+    statement = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * (len(SEED_FIELDS) + 1))})"
+    created = connection.ops.adapt_datetimefield_value(localtime())
+
+    with transaction.atomic():
+        for start in range(0, size, chunk_size):
+            chunk = [next(entries) for _ in range(min(chunk_size, size - start))]
+            with connection.cursor() as cursor:
+                cursor.executemany(statement, [(created, *row) for row in chunk])
+
+        # Raw inserts bypass the model signals, the whole history is summed up at once
+        rollups.rebuild([user])
+        search.rebuild([user])
+        versions.bump([user])
+
+
+def create_users(count, prefix="seed", password=None):
+    """Creates the given no. of configured users, sharing the same password if any."""
+    password = make_password(password)
+    currency = get_reference().currencies[0]
+    users = User.objects.bulk_create([User(username=f"{prefix}-{index}", password=password) for index in range(1, count + 1)])
+    # Some backends do not return the primary keys of bulk inserts
+    users = list(User.objects.filter(username__in=[user.username for user in users]).order_by('id'))
+    Profile.objects.bulk_create([Profile(user=user, currency=currency) for user in users])
+    return users
@@ -1,178 +1,287 @@
+import csv
+import datetime
+import json
+from decimal import Decimal
+
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
-from django.shortcuts import redirect
+from django.core.exceptions import BadRequest, EmptyResultSet
+from django.db.models import Q
 
-from authenticator.models import Profile
-from budgeter.models import Category, Type
+from budgeter.cache import get_reference
 from wallet.models import Transaction
+from wallet.search import match_word, tokenize
 
+# Primary keys of the transaction types (see budgeter/fixtures/type.json)
+TYPE_EXPENSE = 1
+TYPE_INCOME = 2
 
-# Retrieves & groups the common and user-specific data
+# Precision of the transaction amounts
+CENTS = Decimal('0.01')
 
-@login_required
-def finder(request):
-    """Returns the corresponding entries for the applied search & filter criteria."""
 
-    # Unfiltered user-specific entries
-    qs = get_entries(request)
+# Min. no. of entries displayed per page of the entry listing
+PAGE_SIZE = 50
 
-    query_type = request.GET.get('input-type')
-    query_category_search = request.GET.get('input-category-search')
-    query_category = request.GET.get('input-category')
-    query_type_advanced = request.GET.get('input-type-advanced')
-    query_category_advanced = request.GET.get('input-category-advanced')
-    query_date = request.GET.get('input-date')
-    query_search = request.GET.get('input-search')
 
-    # Checks the corresponding match for the type filter
-    if query_type is not None:
-        qs = filter_type(qs, query_type)
-    # Checks the corresponding match for the category search input
-    if query_category_search is not None:
-        qs = search_category(qs, query_category_search)
-    # Checks the corresponding match for the category filter
-    if query_category is not None:
-        qs = filter_category(qs, query_category)
-    # Checks the corresponding match for the advanced filter
-    if query_type_advanced is None or query_type_advanced == "All":
-        if query_category_advanced is None or query_category_advanced == "All":
-            if query_date is not None:
-                qs = filter_date(qs, query_date)
-        else:
-            if query_date is not None:
-                qs_category = filter_category_advanced(qs, query_category_advanced)
-                qs_date = qs = filter_date(qs, query_date)
-                qs = qs_category & qs_date
-    else:
-        if query_category_advanced is None or query_category_advanced == "All":
-            if query_date is not None:
-                qs_type = filter_type_advanced(qs, query_type_advanced)
-                qs_date = filter_date(qs, query_date)
-                qs = qs_type & qs_date
-        else:
-            if query_date is not None:
-                qs_type = filter_type_advanced(qs, query_type_advanced)
-                qs_category = filter_category_advanced(qs, query_category_advanced)
-                qs_date = filter_date(qs, query_date)
-                qs = qs_type & qs_category & qs_date
-    
-    # Checks the corresponding match for the search input
-    if query_search is not None:
-        qs = search_all(qs, query_search)
-        
-    return qs
+# Retrieves & groups the common and user-specific data
+
+@login_required
+def finder(request):
+    """Returns the corresponding entries for the applied search & filter criteria, filtered in a single query."""
+    return get_entries(request).filter(get_filters(request).q)
 
 
 @login_required
 def get_entries(request):
-    """Retrieves the user's set of entries."""
-    user = User.objects.get(pk=request.user.id)
-    data = Transaction.objects.filter(user=user).order_by('-date', '-amount', 'name')
+    """Retrieves the user's set of entries, in the order of the entry listing."""
+    data = Transaction.objects.filter(user=request.user).order_by('-date', '-amount', 'name')
     return data
 
 
-def group_entries(data):
-    """Groups the entries into expenses & income."""
-    expenses = data.filter(type="1").order_by('-amount')
-    income = data.filter(type="2").order_by('-amount')
-    return expenses, income
-
-
-# Searches & filters the user's data
-
-def filter_type(qs, query_type):
-    """Filters the entries based on the type criteria."""
-    qs = qs.filter(type__name__iexact=query_type)
-    return qs
-
-
-def filter_category(qs, query_category):
-    """Filters the entries based on the category criteria."""
-    qs = qs.filter(category__name__iexact=query_category)
-    return qs
-
-
-def search_category(qs, query_category_search):
-    """Filters the entries based on the category search query."""
-    qs = qs.filter(category__name__icontains=query_category_search)
-    return qs
-
-
-def filter_type_advanced(qs, query_type_advanced):
-    """Filters the entries based on the advanced type criteria."""
-    qs = qs.filter(type__name__iexact=query_type_advanced)
-    return qs
-
-
-def filter_category_advanced(qs, query_category_advanced):
-    """Filters the entries based on the advanced category criteria."""
-    qs = qs.filter(category__name__iexact=query_category_advanced)
-    return qs
-
-
-def filter_date(qs, query_date):
-    """Filters the entries based on the date range."""
-    start_date, end_date = format_date(query_date)
-    qs = qs.filter(date__range=[start_date, end_date])
-    return qs
+def to_cents(amount):
+    """Rounds an aggregated amount to cents, as some backends (e.g. SQLite) sum them as floats."""
+    return Decimal(amount).quantize(CENTS)
+
+
+# Paginates the user's entries by day
+#
+# The listing fetches the displayed columns only, into compact rows rather
+# than model instances, with the labels of the type & category taken from
+# the reference data instead of being joined or lazily loaded per row.
+
+# Displayed columns of the listed entries
+ENTRY_COLUMNS = ('id', 'date', 'type_id', 'category_id', 'name', 'amount', 'note')
+
+
+class EntryRow:
+    """Holds the displayed columns of a listed entry, along with the labels of its type & category."""
+    __slots__ = ENTRY_COLUMNS + ('type', 'category')
+
+    def __init__(self, id, date, type_id, category_id, name, amount, note, type, category):
+        self.id = id
+        self.date = date
+        self.type_id = type_id
+        self.category_id = category_id
+        self.name = name
+        self.amount = amount
+        self.note = note
+        self.type = type
+        self.category = category
+
+
+def build_rows(values):
+    """Builds the rows of the listed entries from their displayed columns."""
+    reference = get_reference()
+    type_labels, category_labels = reference.type_labels, reference.category_labels
+    return [EntryRow(*columns, type_labels[columns[2]], category_labels[columns[3]]) for columns in values]
+
+
+def paginate_entries(qs, before=None, page_size=PAGE_SIZE):
+    """
+    Returns the rows of the next page of entries older than the cursor date
+    and the cursor of the following page (None on the last page).
+
+    Pages are keyed on the date (keyset pagination), so fetching a page
+    costs the same regardless of its position in the history. A page is
+    completed up to the end of its last day, so that a day is never
+    split across two pages.
+    """
+    if before is not None:
+        qs = qs.filter(date__lt=before)
+    values = qs.values_list(*ENTRY_COLUMNS)
+    page = build_rows(values[:page_size + 1])
+    if len(page) <= page_size:
+        return page, None
+
+    following = page.pop()
+    last_day = page[-1].date
+    if following.date == last_day:
+        page = [entry for entry in page if entry.date != last_day]
+        page.extend(build_rows(values.filter(date=last_day)))
+        if not qs.filter(date__lt=last_day).exists():
+            return page, None
+    return page, last_day
+
+
+def get_cursor(request):
+    """Returns the cursor date of the requested page, if any."""
+    try:
+        return datetime.date.fromisoformat(request.GET.get('before', ''))
+    except ValueError:
+        return None
+
+
+# Exports the user's data
+
+# Columns of the exported entries
+EXPORT_COLUMNS = ('date', 'type', 'category', 'name', 'amount', 'note')
+
+# No. of entries fetched per database round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(qs, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the entries as tuples of the exported columns, fetched in chunks."""
+    reference = get_reference()
+    rows = qs.values_list('date', 'type_id', 'category_id', 'name', 'amount', 'note')
+    for date, type_id, category_id, name, amount, note in rows.iterator(chunk_size=chunk_size):
+        yield (
+            date.isoformat(),
+            reference.types_by_id[type_id].name,
+            reference.categories_by_id[category_id].name,
+            name,
+            str(amount),
+            note,
+        )
+
+
+class Echo:
+    """Represents a file-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yields the rows formatted as CSV lines, header first."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_json(rows):
+    """Yields the rows formatted as a JSON array of objects."""
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False)
+        separator = ","
+    yield "]"
+
+
+# Compiles the search & filter criteria
+#
+# The GET parameters are compiled into a single Q expression before any entry
+# is queried. The type & category names are resolved to their ids against the
+# in-memory reference data, so that the entries are filtered on their own
+# columns with no join to the Type & Category tables, and the date range is
+# validated & parsed once per request. A name matching no type or category
+# matches no entries, which Django answers without running the query.
+
+class Filters:
+    """
+    Represents the compiled search & filter criteria of a request: the Q
+    expression over the entry columns, the parsed date range (None without
+    a date filter) and the condition of each applied parameter.
+    """
+
+    def __init__(self, conditions, date_range=None):
+        self.conditions = conditions
+        self.date_range = date_range
+        self.q = Q()
+        for condition in conditions.values():
+            self.q &= condition
+
+
+def get_filters(request):
+    """Returns the compiled search & filter criteria of the request, compiled on first use."""
+    if getattr(request, 'filters', None) is None:
+        try:
+            request.filters = compile_filters(request.GET, request.user)
+        except ValueError as error:
+            raise BadRequest(f"Invalid filter: {error}")
+    return request.filters
+
+
+def compile_filters(params, user):
+    """Compiles the search & filter parameters into the conditions over the user's entries."""
+    conditions = {}
+
+    query_type = params.get('input-type')
+    if query_type is not None:
+        conditions['input-type'] = Q(type_id__in=match_types(query_type))
+    query_category_search = params.get('input-category-search')
+    if query_category_search is not None:
+        conditions['input-category-search'] = Q(category_id__in=match_categories(query_category_search, partial=True))
+    query_category = params.get('input-category')
+    if query_category is not None:
+        conditions['input-category'] = Q(category_id__in=match_categories(query_category))
+
+    # The advanced filters only apply along with the date range they are submitted with
+    date_range = None
+    query_date = params.get('input-date')
+    if query_date is not None:
+        date_range = parse_date_range(query_date)
+        conditions['input-date'] = Q(date__range=date_range)
+        query_type_advanced = params.get('input-type-advanced')
+        if query_type_advanced is not None and query_type_advanced != "All":
+            conditions['input-type-advanced'] = Q(type_id__in=match_types(query_type_advanced))
+        query_category_advanced = params.get('input-category-advanced')
+        if query_category_advanced is not None and query_category_advanced != "All":
+            conditions['input-category-advanced'] = Q(category_id__in=match_categories(query_category_advanced))
+
+    query_search = params.get('input-search')
+    if query_search is not None:
+        conditions['input-search'] = compile_search(query_search, user)
 
+    return Filters(conditions, date_range)
 
-def search_all(qs, query_search):
-    """Filters the entries based on the search query."""
-    if check_type(query_search):
-        qs = qs.filter(type__name__icontains=query_search)
-    elif check_category(query_search):
-        qs = qs.filter(category__name__icontains=query_search)
-    elif check_note(query_search):
-        qs = qs.filter(note__icontains=query_search)
-    else:
-        qs = qs.filter(name__icontains=query_search)
-    return qs
 
+def compile_search(query_search, user):
+    """
+    Returns the condition of the search query: the entries of the type or
+    category it names, otherwise the entries whose name or note has words
+    starting with each word of the query, looked up in the search index.
+    """
+    reference = get_reference()
+    if reference.find_type(query_search) is not None:
+        return Q(type_id__in=match_types(query_search, partial=True))
+    if reference.find_category(query_search) is not None:
+        return Q(category_id__in=match_categories(query_search, partial=True))
+    condition = Q()
+    for word in sorted(tokenize(query_search)):
+        condition &= Q(id__in=match_word(user, word))
+    return condition
 
-# Validates & checks if the search query parameters are valid
 
-def check_type(param):
-    """Validates the query parameters for entry types."""
-    types = list(dict.fromkeys([item.name for item in Type.objects.all()]))
-    return param.title() in types
+def match_types(name, partial=False):
+    """Returns the ids of the types named after the name (or containing it, if partial), regardless of its case."""
+    return match_names(get_reference().types, name, partial)
 
 
-def check_category(param):
-    """Validates the query parameters for entry categories."""
-    categories = list(dict.fromkeys([item.name for item in Category.objects.all()]))
-    return param.title() in categories
+def match_categories(name, partial=False):
+    """Returns the ids of the categories named after the name (or containing it, if partial), regardless of its case."""
+    return match_names(get_reference().categories, name, partial)
 
 
-def check_note(param):
-    """Validates the query parameters for entry notes."""
-    notes = list(dict.fromkeys([item.note for item in Transaction.objects.all()]))
-    text = []
-    for note in notes:
-        text.extend(note.lower().split())
-    return param.lower() in text
+def match_names(items, name, partial):
+    """Returns the ids of the items matching the name, regardless of its case."""
+    name = name.lower()
+    if partial:
+        return [item.pk for item in items if name in item.name.lower()]
+    return [item.pk for item in items if item.name.lower() == name]
 
 
-def format_date(date):
-    """Formats the date into the proper format"""
-    # Splits the input into two dates
-    elements = date.split(" - ")
-    # Formats the start date
-    elements[0] = elements[0].split("/")
-    start_date = f"{elements[0][2]}-{elements[0][0]}-{elements[0][1]}"
-    # Formats the end date
-    elements[1] = elements[1].split("/")
-    end_date = f"{elements[1][2]}-{elements[1][0]}-{elements[1][1]}"
+def parse_date_range(value):
+    """Parses a 'MM/DD/YYYY - MM/DD/YYYY' date range into its start & end dates."""
+    try:
+        start_date, end_date = (datetime.datetime.strptime(date.strip(), "%m/%d/%Y").date() for date in value.split(" - "))
+    except ValueError:
+        raise ValueError(f"Invalid date range: {value!r}")
     return start_date, end_date
 
 
-# User & profile configuration tool
-
-def check_configuration(request):
-    """Prevents the user from skipping the initial configuration step."""
+def explain_filters(request):
+    """Returns the conditions of the request's criteria, along with the SQL & the query plan of the first page of entries."""
+    filters = get_filters(request)
+    page = finder(request)[:PAGE_SIZE + 1]
+    result = {
+        "conditions": {parameter: str(condition) for parameter, condition in filters.conditions.items()},
+        "date_range": filters.date_range,
+    }
     try:
-        if Profile.objects.get(user=request.user.id):
-            pass
-    except ObjectDoesNotExist:
-        return redirect('/configure')
\ No newline at end of file
+        sql, params = page.query.sql_with_params()
+    except EmptyResultSet:
+        return {**result, "sql": None, "params": [], "plan": "No query: the criteria match no entries."}
+    return {**result, "sql": sql, "params": list(params), "plan": page.explain()}
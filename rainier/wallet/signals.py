@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authenticator import versions
+from wallet import duplicates, rollups, search
+from wallet.models import SearchToken, Transaction
+
+
+# Keeps the rollups in sync with the transactions
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction(sender, instance, **kwargs):
+    """Remembers the stored state of the transaction before it is overwritten."""
+    instance.rollup_previous = None
+    if instance.pk is not None:
+        instance.rollup_previous = Transaction.objects.filter(pk=instance.pk).values_list(*rollups.ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups(sender, instance, **kwargs):
+    """Moves the saved transaction from its previous rollups to the current ones."""
+    changes = [(rollups.get_state(instance), 1)]
+    previous = getattr(instance, 'rollup_previous', None)
+    if previous is not None:
+        changes.append((previous, -1))
+    rollups.apply_changes(changes)
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_rollups(sender, instance, **kwargs):
+    """Removes the deleted transaction from its rollups."""
+    rollups.record([rollups.get_state(instance)], sign=-1)
+
+
+# Stamps the fingerprint used by the duplicate checks
+
+@receiver(pre_save, sender=Transaction)
+def update_fingerprint(sender, instance, **kwargs):
+    """Fingerprints the transaction from its current fields."""
+    duplicates.stamp(instance)
+
+
+# Keeps the search index in sync with the transaction names & notes
+
+@receiver(post_save, sender=Transaction)
+def update_search_index(sender, instance, created, **kwargs):
+    """Indexes the name & note of the saved transaction."""
+    if created:
+        SearchToken.objects.bulk_create(search.build_tokens([instance]))
+    else:
+        search.index_entries([instance])
+
+
+# Bumps the data version of the user on any change, which also discards
+# their cached statistics & analytics history
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def bump_data_version(sender, instance, **kwargs):
+    """Marks the data of the transaction's user as changed."""
+    if instance.user_id is not None:
+        versions.bump([instance.user_id])
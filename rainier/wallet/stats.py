@@ -0,0 +1,198 @@
+import asyncio
+import calendar
+import datetime
+
+from django.core.cache import caches
+
+from authenticator.versions import get_version
+from monitor.metrics import count_cache
+from wallet.concurrency import run
+from wallet.rollups import rollup_balance, rollup_categories, rollup_daily, rollup_monthly
+from wallet.services import TYPE_EXPENSE, TYPE_INCOME
+
+
+# Sections of the statistics served by the statistics API, by name
+STATISTICS_SECTIONS = {
+    "balance": ("balance_total", "month_current", "expenses_current", "income_current", "expenses_relative", "income_relative"),
+    "categories": ("month_current", "labels_expenses_current", "values_expenses_current"),
+    "months": ("labels_entries_previous", "values_expenses_previous", "values_income_previous"),
+    "days": ("month_current", "days_current"),
+}
+
+
+# Caches the statistics
+#
+# The statistics only change with the user's data, the reference data & the
+# current day, all embedded in the cache key: a write bumps the user's data
+# version (see authenticator/versions.py), so that the stale entries are never
+# read again and expire on their own. A read is a single cache get. The
+# 'statistics' cache alias selects the backend (see settings.CACHES).
+
+def get_statistics_key(profile, reference_version, today):
+    """Returns the cache key of the user's statistics, as of their data version."""
+    return f"wallet:statistics:{profile.user_id}:{get_version(profile)}:{reference_version}:{today.isoformat()}"
+
+
+def get_statistics(profile, categories_expenses, reference_version, today=None):
+    """Returns the statistics of the profile's user from the cache, computing them on a miss."""
+    if today is None:
+        today = datetime.date.today()
+    cache = caches['statistics']
+    key = get_statistics_key(profile, reference_version, today)
+    statistics = cache.get(key)
+    count_cache("statistics", statistics is not None)
+    if statistics is None:
+        statistics = compute_statistics(profile.user_id, categories_expenses, today)
+        cache.set(key, statistics)
+    return statistics
+
+
+async def get_statistics_async(profile, categories_expenses, reference_version, today=None):
+    """Returns the statistics like get_statistics(), running their queries concurrently on a miss."""
+    if today is None:
+        today = datetime.date.today()
+    cache = caches['statistics']
+    key = get_statistics_key(profile, reference_version, today)
+    statistics = await cache.aget(key)
+    count_cache("statistics", statistics is not None)
+    if statistics is None:
+        statistics = await compute_statistics_async(profile.user_id, categories_expenses, today)
+        await cache.aset(key, statistics)
+    return statistics
+
+
+# Computes the user-specific statistics displayed on the dashboard
+
+def compute_statistics(user, categories_expenses, today=None):
+    """
+    Computes the balance, the current & previous months cash-flows,
+    the category chart data and the daily summary of the current month.
+
+    The figures are read from the user's rollups, so the cost depends on
+    the number of months & categories rather than on the no. of entries.
+    """
+    if today is None:
+        today = datetime.date.today()
+
+    month_current, month_current_end, months_previous = get_periods(today)
+    totals = rollup_balance(user)
+    totals_monthly = rollup_monthly(user, months_previous[-1], month_current_end)
+    totals_categories = rollup_categories(user, month_current, month_current_end)
+    totals_daily = rollup_daily(user, month_current, month_current_end)
+    return summarize_statistics(totals, totals_monthly, totals_categories, totals_daily, categories_expenses, today)
+
+
+async def compute_statistics_async(user, categories_expenses, today=None):
+    """Computes the statistics like compute_statistics(), running the rollup queries concurrently."""
+    if today is None:
+        today = datetime.date.today()
+
+    month_current, month_current_end, months_previous = get_periods(today)
+    totals, totals_monthly, totals_categories, totals_daily = await asyncio.gather(
+        run(rollup_balance, user),
+        run(rollup_monthly, user, months_previous[-1], month_current_end),
+        run(rollup_categories, user, month_current, month_current_end),
+        run(rollup_daily, user, month_current, month_current_end),
+    )
+    return summarize_statistics(totals, totals_monthly, totals_categories, totals_daily, categories_expenses, today)
+
+
+def get_periods(today):
+    """Returns the first & last days of the current month and the first days of the previous months."""
+    month_current = today.replace(day=1)
+    month_current_end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    return month_current, month_current_end, get_previous_months(today)
+
+
+def summarize_statistics(totals, totals_monthly, totals_categories, totals_daily, categories_expenses, today):
+    """Builds the dashboard statistics from the balance, monthly, category & daily totals."""
+    month_current = today.replace(day=1)
+    months_previous = get_previous_months(today)
+
+    # Computes the user's balance
+    balance_total = totals.get(TYPE_INCOME, 0) - totals.get(TYPE_EXPENSE, 0)
+
+    # Computes the absolute expenses & income for the current month
+    expenses_current = totals_monthly.get((month_current, TYPE_EXPENSE), 0)
+    income_current = totals_monthly.get((month_current, TYPE_INCOME), 0)
+
+    # Computes the relative expenses & income for the current month
+    try:
+        expenses_relative = round(expenses_current / (expenses_current + income_current), 2) * 100
+    except ZeroDivisionError:
+        expenses_relative = 0
+    try:
+        income_relative = round(income_current / (expenses_current + income_current), 2) * 100
+    except ZeroDivisionError:
+        income_relative = 0
+
+    # Computes the expenses & income for the previous 6 months
+    expenses_previous = {}
+    income_previous = {}
+    for month in months_previous:
+        expenses_previous[month.strftime("%B")] = totals_monthly.get((month, TYPE_EXPENSE), 0)
+        income_previous[month.strftime("%B")] = totals_monthly.get((month, TYPE_INCOME), 0)
+
+    # Generates the chart data for the current expenses overview,
+    # ignoring the categories without expenses
+    data_expenses_current = {}
+    for category in categories_expenses:
+        if totals_categories.get(category.id):
+            data_expenses_current[category.name] = totals_categories[category.id]
+
+    return {
+        "balance_total": balance_total,
+        "month_current": today.strftime("%B"),
+        "expenses_current": expenses_current,
+        "income_current": income_current,
+        "expenses_relative": expenses_relative,
+        "income_relative": income_relative,
+        "expenses_previous": expenses_previous,
+        "income_previous": income_previous,
+        "labels_expenses_current": list(data_expenses_current.keys()),
+        "values_expenses_current": list(data_expenses_current.values()),
+        "labels_entries_previous": list(income_previous.keys()),
+        "values_expenses_previous": list(expenses_previous.values()),
+        "values_income_previous": list(income_previous.values()),
+        "days_current": [{"date": date.isoformat(), "count": count, "net": net} for date, (count, net) in totals_daily.items()],
+    }
+
+
+def group_days(entries):
+    """
+    Groups the date-ordered entries by day in a single pass, along with
+    the no. of entries & the net amount of each day. Pages always hold
+    complete days, so the figures match the whole day.
+    """
+    days = {}
+    for entry in entries:
+        summary = days.get(entry.date)
+        if summary is None:
+            summary = days[entry.date] = DailySummary()
+        summary.count += 1
+        if entry.type_id == TYPE_EXPENSE:
+            summary.net -= entry.amount
+        elif entry.type_id == TYPE_INCOME:
+            summary.net += entry.amount
+        summary.entries.append(entry)
+    return days
+
+
+class DailySummary:
+    """Holds the no. of entries, the net amount & the entries of a day."""
+    __slots__ = ('count', 'net', 'entries')
+
+    def __init__(self):
+        self.count = 0
+        self.net = 0
+        self.entries = []
+
+
+def get_previous_months(today, count=6):
+    """Returns the first days of the months preceding the current one, latest first."""
+    months = []
+    month = today.replace(day=1)
+    for _ in range(count):
+        month = (month - datetime.timedelta(days=1)).replace(day=1)
+        months.append(month)
+    return months
@@ -0,0 +1,611 @@
+import datetime
+import io
+import random
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.exceptions import BadRequest
+from django.db.models import Count, Q, Sum
+from django.test import RequestFactory, TestCase
+
+from budgeter.models import Category
+from authenticator.models import Profile
+from wallet import analytics, duplicates, importer, rollups
+from wallet.models import DailyTotal, MonthlyTotal, SearchToken, Transaction
+from wallet.services import PAGE_SIZE, compile_filters, compile_search, get_filters, paginate_entries
+from wallet.services import TYPE_EXPENSE, TYPE_INCOME
+from wallet.stats import compute_statistics
+
+# Months in calendar order, as used by the legacy computation
+MONTH_INDEX = [datetime.date(2000, month, 1).strftime("%B") for month in range(1, 13)]
+
+
+def legacy_statistics(entries, categories_expenses, today):
+    """
+    Computes the statistics per entry as the dashboard did before they
+    were read from the rollups, month names & years included, for the
+    given day. The entries are (date, type id, category name, amount).
+    """
+    month_current, year_current, year_previous = today.strftime("%B"), today.year, today.year - 1
+    expenses = [entry for entry in entries if entry[1] == TYPE_EXPENSE]
+    income = [entry for entry in entries if entry[1] == TYPE_INCOME]
+
+    balance_total = sum(entry[3] for entry in income) - sum(entry[3] for entry in expenses)
+    expenses_current = sum(amount for date, type_id, category, amount in expenses if date.strftime("%B") == month_current and date.year == year_current)
+    income_current = sum(amount for date, type_id, category, amount in income if date.strftime("%B") == month_current and date.year == year_current)
+
+    # The six previous months by name, all of the current year when they are
+    # in calendar order (wrongly so in January), otherwise June to December
+    # belonging to the previous year
+    months_previous = []
+    month_start = today.replace(day=1)
+    for _ in range(6):
+        month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+        months_previous.append(month_start.strftime("%B"))
+    if months_previous == sorted(months_previous, key=MONTH_INDEX.index, reverse=True):
+        months_years = {month: year_current for month in months_previous}
+    else:
+        months_years = {month: year_current if month in MONTH_INDEX[:5] else year_previous for month in months_previous}
+    expenses_previous = {month: sum(amount for date, type_id, category, amount in expenses if date.strftime("%B") == month and date.year == year) for month, year in months_years.items()}
+    income_previous = {month: sum(amount for date, type_id, category, amount in income if date.strftime("%B") == month and date.year == year) for month, year in months_years.items()}
+
+    data_expenses_current = dict.fromkeys([category.name for category in categories_expenses], 0)
+    for date, type_id, category, amount in expenses:
+        if date.strftime("%B") == month_current and date.year == year_current:
+            data_expenses_current[category] += amount
+    data_expenses_current = {key: value for key, value in data_expenses_current.items() if value != 0}
+
+    return {
+        "balance_total": balance_total,
+        "expenses_current": expenses_current,
+        "income_current": income_current,
+        "expenses_previous": expenses_previous,
+        "income_previous": income_previous,
+        "labels_expenses_current": list(data_expenses_current.keys()),
+        "values_expenses_current": list(data_expenses_current.values()),
+    }
+
+
+class StatisticsTests(TestCase):
+    """Checks the statistics read from the rollups against the per-entry computation they replaced."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('statistics')
+        self.categories_expenses, categories_income = Category.CategoryList(Category)
+        self.categories = {TYPE_EXPENSE: list(self.categories_expenses), TYPE_INCOME: list(categories_income)}
+
+    def create_entries(self, today, days=400, count=300, seed=0):
+        """Creates entries spread over the days preceding the given day, returning them as (date, type id, category name, amount)."""
+        rng = random.Random(seed)
+        entries = []
+        for index in range(count):
+            type_id = rng.choice((TYPE_EXPENSE, TYPE_EXPENSE, TYPE_INCOME))
+            category = rng.choice(self.categories[type_id])
+            date = today - datetime.timedelta(days=rng.randrange(days))
+            amount = Decimal(rng.randrange(100, 50000)) / 100
+            Transaction.objects.create(user=self.user, date=date, type_id=type_id, category=category, name=f"Entry {index}", amount=amount)
+            entries.append((date, type_id, category.name, amount))
+        return entries
+
+    def assertMatchesLegacy(self, statistics, expected):
+        for key, value in expected.items():
+            self.assertEqual(statistics[key], value, key)
+
+    def test_statistics_match_legacy(self):
+        today = datetime.date(2026, 8, 14)
+        entries = self.create_entries(today)
+        statistics = compute_statistics(self.user.pk, self.categories_expenses, today)
+
+        self.assertMatchesLegacy(statistics, legacy_statistics(entries, self.categories_expenses, today))
+        total = statistics["expenses_current"] + statistics["income_current"]
+        self.assertEqual(statistics["expenses_relative"], round(statistics["expenses_current"] / total, 2) * 100)
+
+        # Daily summary of the current month, latest first
+        days = {}
+        for date, type_id, category, amount in entries:
+            if date >= today.replace(day=1):
+                count, net = days.get(date, (0, 0))
+                days[date] = (count + 1, net + (amount if type_id == TYPE_INCOME else -amount))
+        expected_days = [{"date": date.isoformat(), "count": count, "net": net} for date, (count, net) in sorted(days.items(), reverse=True)]
+        self.assertEqual(statistics["days_current"], expected_days)
+
+    def test_previous_months_in_january(self):
+        today = datetime.date(2027, 1, 20)
+        entries = self.create_entries(today, days=200)
+        statistics = compute_statistics(self.user.pk, self.categories_expenses, today)
+        legacy = legacy_statistics(entries, self.categories_expenses, today)
+
+        # Same figures for the current month
+        for key in ("balance_total", "expenses_current", "income_current", "labels_expenses_current", "values_expenses_current"):
+            self.assertEqual(statistics[key], legacy[key], key)
+
+        # The legacy computation took July to December for months of the
+        # current year and reported zeros, the rollups read them from 2026
+        self.assertEqual(set(legacy["expenses_previous"].values()), {0})
+        self.assertEqual(list(statistics["expenses_previous"]), ["December", "November", "October", "September", "August", "July"])
+        for month in range(7, 13):
+            name = MONTH_INDEX[month - 1]
+            expenses = sum(amount for date, type_id, category, amount in entries if type_id == TYPE_EXPENSE and (date.year, date.month) == (2026, month))
+            income = sum(amount for date, type_id, category, amount in entries if type_id == TYPE_INCOME and (date.year, date.month) == (2026, month))
+            self.assertEqual(statistics["expenses_previous"][name], expenses, name)
+            self.assertEqual(statistics["income_previous"][name], income, name)
+        self.assertGreater(statistics["expenses_previous"]["December"], 0)
+
+
+class RollupTests(TestCase):
+    """Checks the incrementally maintained rollups against a rebuild from the transactions after each kind of write."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('rollups')
+        self.other = User.objects.create_user('other')
+        self.groceries, self.dining, self.salary = (Category.objects.get(name=name) for name in ("Groceries", "Dining", "Salary"))
+        self.start = datetime.date(2026, 1, 25)
+        self.entries = [
+            Transaction.objects.create(user=self.user, date=self.start + datetime.timedelta(days=days), type_id=category.type_id, category=category, name="Entry", amount=Decimal(amount))
+            for days, category, amount in ((0, self.groceries, "12.30"), (3, self.dining, "45"), (3, self.salary, "2500"), (9, self.groceries, "7.05"), (40, self.salary, "300.10"))
+        ]
+        Transaction.objects.create(user=self.other, date=self.start, type_id=TYPE_EXPENSE, category=self.dining, name="Entry", amount=Decimal("8"))
+
+    def get_rollups(self):
+        """Returns the stored daily & monthly rollups, running totals included."""
+        daily = list(DailyTotal.objects.order_by('user', 'date').values_list('user', 'date', 'count', 'expenses', 'income', *rollups.CUMULATIVE_FIELDS))
+        monthly = list(MonthlyTotal.objects.order_by('user', 'month', 'type', 'category').values_list('user', 'month', 'type', 'category', 'count', 'amount'))
+        return daily, monthly
+
+    def assertRebuilt(self):
+        """Asserts that the stored rollups are the ones a rebuild writes."""
+        stored = self.get_rollups()
+        self.assertTrue(stored[0] and stored[1])
+        self.assertEqual(rollups.verify(), [])
+        rollups.rebuild()
+        self.assertEqual(self.get_rollups(), stored)
+
+    def test_create(self):
+        self.assertRebuilt()
+        # A day before the others shifts all their running totals
+        Transaction.objects.create(user=self.user, date=self.start - datetime.timedelta(days=30), type_id=TYPE_EXPENSE, category=self.dining, name="Entry", amount=Decimal("3.99"))
+        self.assertRebuilt()
+
+    def test_edits(self):
+        entry = self.entries[1]
+        for field, value in (
+            ("amount", Decimal("54.45")),
+            ("date", self.start + datetime.timedelta(days=60)),
+            ("date", self.start - datetime.timedelta(days=1)),
+            ("category", self.groceries),
+        ):
+            setattr(entry, field, value)
+            entry.save()
+            self.assertRebuilt()
+
+        entry.type_id, entry.category = TYPE_INCOME, self.salary
+        entry.save()
+        self.assertRebuilt()
+
+        entry.user = self.other
+        entry.save()
+        self.assertRebuilt()
+
+    def test_stale_instance(self):
+        # The previous state is read from the database, not from the instance being saved
+        stale = Transaction.objects.get(pk=self.entries[0].pk)
+        self.entries[0].amount, self.entries[0].date = Decimal("99"), self.start + datetime.timedelta(days=5)
+        self.entries[0].save()
+        stale.name = "Renamed"
+        stale.save()
+        self.assertRebuilt()
+
+        # Saving an unchanged entry leaves the rollups as they are
+        stored = self.get_rollups()
+        self.entries[2].save()
+        self.assertEqual(self.get_rollups(), stored)
+
+    def test_delete(self):
+        # The last entry of a day & month prunes their rollups
+        self.entries[3].delete()
+        self.assertRebuilt()
+        self.entries[1].delete()
+        self.assertRebuilt()
+
+    def test_queryset_delete(self):
+        Transaction.objects.filter(user=self.user, type_id=TYPE_EXPENSE).delete()
+        self.assertRebuilt()
+
+    def test_bulk(self):
+        # More days than BULK_THRESHOLD, written without the model signals as the import does
+        count = rollups.BULK_THRESHOLD * 3
+        entries = Transaction.objects.bulk_create(
+            Transaction(user=self.user, date=self.start + datetime.timedelta(days=index * 2 - 20), type_id=TYPE_EXPENSE, category=self.groceries, name="Entry", amount=Decimal(index) + Decimal("0.15"))
+            for index in range(count)
+        )
+        with mock.patch('wallet.rollups.rebuild_cumulative', wraps=rollups.rebuild_cumulative) as rebuild_cumulative:
+            rollups.record(rollups.get_state(entry) for entry in entries)
+        rebuild_cumulative.assert_called_once_with(self.user.pk, self.start - datetime.timedelta(days=20))
+        self.assertRebuilt()
+
+        # Detached in bulk (QuerySet.update bypasses the signals), pruning the rows they created
+        Transaction.objects.filter(pk__in=[entry.pk for entry in entries]).update(user=None)
+        rollups.record((rollups.get_state(entry) for entry in entries), sign=-1)
+        self.assertRebuilt()
+
+    def test_range_totals(self):
+        entries = Transaction.objects.filter(user=self.user)
+        first, last = self.start, self.start + datetime.timedelta(days=40)
+        days = [first + datetime.timedelta(days=offset) for offset in (-10, -1, 0, 1, 3, 5, 9, 20, 40, 50)]
+        # Ranges starting & ending on days with & without entries, before, within & after them
+        for start in days:
+            for end in (day for day in days if day >= start):
+                totals = entries.filter(date__range=[start, end]).aggregate(
+                    count=Count('id'),
+                    expenses=Sum('amount', filter=Q(type=TYPE_EXPENSE), default=0),
+                    income=Sum('amount', filter=Q(type=TYPE_INCOME), default=0),
+                )
+                expected = {"count": totals["count"], "expenses": totals["expenses"], "income": totals["income"], "net": totals["income"] - totals["expenses"]}
+                self.assertEqual(rollups.range_totals(self.user, start, end), expected, (start, end))
+        self.assertEqual(rollups.range_totals(self.user, first, last)["count"], len(self.entries))
+
+
+class PaginationTests(TestCase):
+    """Checks that the pages of the entry listing cover every entry once, without splitting a day."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('pages')
+        self.groceries = Category.objects.get(name="Groceries")
+        self.today = datetime.date(2026, 5, 20)
+
+    def create_entries(self, per_day):
+        """Creates the given no. of entries per day, the first day being the latest."""
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, date=self.today - datetime.timedelta(days=days), type_id=TYPE_EXPENSE, category=self.groceries, name=f"Entry {index}", amount=Decimal(index + 1))
+            for days, count in enumerate(per_day)
+            for index in range(count)
+        )
+
+    def get_entries(self):
+        return Transaction.objects.filter(user=self.user).order_by('-date', '-amount', 'name')
+
+    def get_pages(self, page_size=PAGE_SIZE):
+        """Returns the ids & cursor of every page, following the cursors from the first page."""
+        pages, before = [], None
+        while True:
+            page, before = paginate_entries(self.get_entries(), before, page_size)
+            pages.append(([entry.id for entry in page], before))
+            if before is None:
+                return pages
+
+    def test_exact_fit(self):
+        self.create_entries([20, 20, PAGE_SIZE - 40])
+        pages = self.get_pages()
+        self.assertEqual(pages, [(list(self.get_entries().values_list('id', flat=True)), None)])
+
+    def test_day_boundary(self):
+        # One more day after a full page starts the next page
+        self.create_entries([PAGE_SIZE, 3])
+        pages = self.get_pages()
+        self.assertEqual([(len(ids), before) for ids, before in pages], [(PAGE_SIZE, self.today), (3, None)])
+
+    def test_day_within_page_boundary(self):
+        # The 5th & 6th entries share a day, which is completed on the first page
+        self.create_entries([2, 2, 3, 4, 1])
+        pages = self.get_pages(page_size=5)
+        days = [self.today - datetime.timedelta(days=days) for days in range(5)]
+        self.assertEqual([(len(ids), before) for ids, before in pages], [(7, days[2]), (5, None)])
+        self.assertEqual(sum((ids for ids, before in pages), []), list(self.get_entries().values_list('id', flat=True)))
+
+        # A split last day with nothing older ends the listing
+        Transaction.objects.filter(user=self.user, date=days[4]).delete()
+        self.assertEqual([(len(ids), before) for ids, before in self.get_pages(page_size=5)], [(7, days[2]), (4, None)])
+        self.assertEqual([(len(ids), before) for ids, before in self.get_pages(page_size=9)], [(11, None)])
+
+    def test_before(self):
+        self.create_entries([1, 2, 3])
+        page, before = paginate_entries(self.get_entries(), self.today - datetime.timedelta(days=1))
+        self.assertEqual([(entry.date, entry.category_id) for entry in page], [(self.today - datetime.timedelta(days=2), self.groceries.pk)] * 3)
+        self.assertIsNone(before)
+        self.assertEqual(paginate_entries(self.get_entries(), self.today - datetime.timedelta(days=2)), ([], None))
+
+
+class FilterTests(TestCase):
+    """Checks the compilation of the search & filter parameters into a single condition."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('filters', password='pw-filters-123')
+        Profile.objects.create(user=self.user, currency_id=1)
+        self.dining, self.salary = Category.objects.get(name="Dining"), Category.objects.get(name="Salary")
+        for date, category, amount in ((datetime.date(2026, 2, 3), self.dining, "20"), (datetime.date(2026, 3, 1), self.salary, "1000")):
+            Transaction.objects.create(user=self.user, date=date, type_id=category.type_id, category=category, name="Entry", amount=Decimal(amount))
+
+    def filter(self, params):
+        return set(Transaction.objects.filter(user=self.user).filter(compile_filters(params, self.user).q).values_list('category__name', flat=True))
+
+    def test_names_resolved(self):
+        filters = compile_filters({'input-type': "income", 'input-category': "DINING", 'input-category-search': "sal"}, self.user)
+        self.assertEqual(filters.conditions, {
+            'input-type': Q(type_id__in=[TYPE_INCOME]),
+            'input-category': Q(category_id__in=[self.dining.pk]),
+            'input-category-search': Q(category_id__in=[self.salary.pk]),
+        })
+        self.assertEqual(self.filter({'input-type': "Income"}), {"Salary"})
+        self.assertEqual(self.filter({'input-category-search': "DIN"}), {"Dining"})
+
+    def test_unknown_name(self):
+        filters = compile_filters({'input-category': "Rent"}, self.user)
+        self.assertEqual(filters.conditions, {'input-category': Q(category_id__in=[])})
+        # Answered without querying the database
+        with self.assertNumQueries(0):
+            self.assertEqual(list(Transaction.objects.filter(filters.q)), [])
+
+    def test_advanced_filters(self):
+        advanced = {'input-type-advanced': "Expense", 'input-category-advanced': "Dining"}
+        filters = compile_filters(advanced, self.user)
+        self.assertEqual((filters.conditions, filters.date_range), ({}, None))
+
+        dates = (datetime.date(2026, 2, 1), datetime.date(2026, 3, 31))
+        filters = compile_filters({**advanced, 'input-date': "02/01/2026 - 03/31/2026"}, self.user)
+        self.assertEqual(filters.date_range, dates)
+        self.assertEqual(set(filters.conditions), {'input-date', 'input-type-advanced', 'input-category-advanced'})
+        self.assertEqual(self.filter({**advanced, 'input-date': "02/01/2026 - 03/31/2026"}), {"Dining"})
+        self.assertEqual(self.filter({'input-type-advanced': "All", 'input-date': "02/01/2026 - 03/31/2026"}), {"Dining", "Salary"})
+        self.assertEqual(self.filter({'input-date': "03/01/2026 - 03/01/2026"}), {"Salary"})
+
+    def test_bad_date(self):
+        request = RequestFactory().get('/entries', {'input-date': "2026-02-01"})
+        request.user = self.user
+        with self.assertRaises(BadRequest):
+            get_filters(request)
+
+        self.client.login(username='filters', password='pw-filters-123')
+        self.assertEqual(self.client.get('/entries', {'input-date': "02/30/2026 - 03/01/2026"}).status_code, 400)
+        self.assertEqual(self.client.get('/entries', {'input-date': "02/01/2026 - 03/01/2026"}).status_code, 200)
+
+
+class DuplicateTests(TestCase):
+    """Checks the fingerprints of the entries and the confirmation asked before saving a duplicate."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('duplicates', password='pw-duplicates-123')
+        Profile.objects.create(user=self.user, currency_id=1)
+        self.dining = Category.objects.get(name="Dining")
+        self.client.login(username='duplicates', password='pw-duplicates-123')
+
+    def post_entry(self, url, name="Corner cafe", **fields):
+        return self.client.post(url, {'type': TYPE_EXPENSE, 'name': name, 'amount': "4.50", 'date': "03/14/2026", 'category': self.dining.pk, 'note': "", **fields})
+
+    def test_fingerprint(self):
+        date = datetime.date(2026, 3, 14)
+        fingerprint = duplicates.get_fingerprint(self.user.pk, date, Decimal("4.5"), "Corner cafe")
+        self.assertEqual(duplicates.get_fingerprint(self.user.pk, date, "4.50", "  CORNER   cafe\t"), fingerprint)
+        for user_id, other_date, amount, name in (
+            (self.user.pk + 1, date, "4.50", "Corner cafe"),
+            (self.user.pk, date + datetime.timedelta(days=1), "4.50", "Corner cafe"),
+            (self.user.pk, date, "4.51", "Corner cafe"),
+            (self.user.pk, date, "4.50", "Corner cafes"),
+        ):
+            self.assertNotEqual(duplicates.get_fingerprint(user_id, other_date, amount, name), fingerprint)
+
+        # Stamped on save, following the edits
+        entry = Transaction.objects.create(user=self.user, date=date, type_id=TYPE_EXPENSE, category=self.dining, name="corner Cafe ", amount=Decimal("4.50"))
+        self.assertEqual(entry.fingerprint, fingerprint)
+        entry.amount = Decimal("5")
+        entry.save()
+        self.assertEqual(Transaction.objects.get(pk=entry.pk).fingerprint, duplicates.get_fingerprint(self.user.pk, date, "5", "Corner cafe"))
+
+    def test_save_anyway(self):
+        self.assertRedirects(self.post_entry('/create'), '/', fetch_redirect_response=False)
+
+        # The same entry again asks for a confirmation
+        response = self.post_entry('/create', name="corner  CAFE")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Save it anyway?")
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+        self.assertRedirects(self.post_entry('/create', name="corner  CAFE", duplicate="on"), '/', fetch_redirect_response=False)
+        self.assertEqual(len(duplicates.find_duplicates([self.user])), 1)
+
+    def test_edit(self):
+        self.post_entry('/create')
+        entry = Transaction.objects.create(user=self.user, date=datetime.date(2026, 3, 14), type_id=TYPE_EXPENSE, category=self.dining, name="Bakery", amount=Decimal("4.50"))
+
+        # An entry is not a duplicate of itself
+        self.assertRedirects(self.post_entry(f'/edit/{entry.pk}', name="Bakery", note="Bread"), '/', fetch_redirect_response=False)
+
+        response = self.post_entry(f'/edit/{entry.pk}')
+        self.assertContains(response, "Save it anyway?")
+        self.assertEqual(Transaction.objects.get(pk=entry.pk).name, "Bakery")
+
+        self.assertRedirects(self.post_entry(f'/edit/{entry.pk}', duplicate="on"), '/', fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.get(pk=entry.pk).name, "Corner cafe")
+
+
+class ImportTests(TestCase):
+    """Checks the parsing of the statements and the batched writes of the import."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('import')
+
+    def build_csv(self, count, start=datetime.date(2026, 1, 1)):
+        """Builds a CSV statement of the given no. of distinct rows, spread over a few weeks."""
+        lines = ["date,type,category,name,amount,note"]
+        for index in range(count):
+            date = start + datetime.timedelta(days=index % 40)
+            lines.append(f"{date.isoformat()},Expense,Groceries,Store {index},{index % 90 + 1}.25,weekly groceries")
+        return "\n".join(lines).encode()
+
+    def test_parse_csv(self):
+        statement = "\ufeffDate, Type ,Category,Name,Amount,Note\r\n03/15/2026,Expense,Dining, Cafe ,\"1,204.50\",\r\n".encode()
+        rows = list(importer.parse_csv(io.BytesIO(statement)))
+        self.assertEqual(rows, [(2, {"date": "03/15/2026", "type": "Expense", "category": "Dining", "name": "Cafe", "amount": "1,204.50", "note": ""})])
+
+        result = importer.import_entries(self.user, iter(rows))
+        self.assertEqual((result.created, result.errors), (1, []))
+        entry = Transaction.objects.get(user=self.user)
+        self.assertEqual((entry.date, entry.type_id, entry.category.name, entry.amount), (datetime.date(2026, 3, 15), TYPE_EXPENSE, "Dining", Decimal("1204.50")))
+
+    def test_parse_ofx(self):
+        statement = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260302120000<TRNAMT>-42.10<NAME>Grocer<MEMO>Card 1234
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260305<TRNAMT>1500.00<NAME>Employer</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"""
+        rows = list(importer.parse_ofx(io.BytesIO(statement)))
+        self.assertEqual(rows, [
+            (1, {"date": "20260302", "name": "Grocer", "amount": "-42.10", "note": "Card 1234"}),
+            (2, {"date": "20260305", "name": "Employer", "amount": "1500.00", "note": ""}),
+        ])
+
+        # The type follows the sign of the amount, the category its default
+        result = importer.import_entries(self.user, iter(rows))
+        self.assertEqual(result.created, 2)
+        entries = Transaction.objects.filter(user=self.user).order_by('date')
+        self.assertEqual(
+            [(entry.type_id, entry.category.name, entry.amount) for entry in entries],
+            [(TYPE_EXPENSE, "Miscellaneous", Decimal("42.10")), (TYPE_INCOME, "Additional", Decimal("1500.00"))],
+        )
+
+    def test_invalid_rows(self):
+        statement = b"date,type,category,name,amount\n2026-13-01,Expense,Dining,Cafe,5\n2026-01-02,Income,Dining,Cafe,5\n2026-01-03,Expense,Dining,,5\n2026-01-04,Expense,Dining,Cafe,abc\n"
+        result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(statement)))
+        self.assertEqual(result.created, 0)
+        self.assertEqual([line for line, error in result.errors], [2, 3, 4, 5])
+
+    def test_batches(self):
+        count = importer.IMPORT_BATCH_SIZE + 5
+        with mock.patch('wallet.importer.write_batch', wraps=importer.write_batch) as write_batch:
+            result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(self.build_csv(count))))
+        self.assertEqual([len(call.args[1]) for call in write_batch.call_args_list], [importer.IMPORT_BATCH_SIZE, 5])
+        self.assertEqual((result.created, result.errors), (count, []))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), count)
+        self.assertEqual(SearchToken.objects.filter(user=self.user, token="groceries").count(), count)
+
+    def test_duplicates_skipped(self):
+        statement = self.build_csv(30)
+        importer.import_entries(self.user, importer.parse_csv(io.BytesIO(statement)), batch_size=7)
+
+        # The same rows again, in other batches, along with new ones
+        statement += b"\n2026-03-01,Expense,Groceries,Store new,3.50,"
+        result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(statement)), batch_size=11)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(result.errors), 30)
+        self.assertEqual({error for line, error in result.errors}, {"Duplicate of an existing entry"})
+
+        # Repeated rows within a statement are kept, even across batches
+        repeated = b"date,type,category,name,amount\n" + b"2026-04-01,Expense,Dining,Cafe,4.00\n" * 3
+        result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(repeated)), batch_size=2)
+        self.assertEqual((result.created, result.errors), (3, []))
+
+        result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(statement)), skip_duplicates=False)
+        self.assertEqual((result.created, result.errors), (31, []))
+
+    def test_rollups_match_rebuild(self):
+        Transaction.objects.create(user=self.user, date=datetime.date(2026, 1, 20), type_id=TYPE_INCOME, category=Category.objects.get(name="Salary"), name="Salary", amount=Decimal("2500"))
+        result = importer.import_entries(self.user, importer.parse_csv(io.BytesIO(self.build_csv(150))), batch_size=40)
+        self.assertEqual(result.created, 150)
+        self.assertEqual(rollups.verify([self.user]), [])
+
+
+class AnalyticsTests(TestCase):
+    """Checks the in-memory histories and the trends computed from them."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('analytics')
+        Profile.objects.create(user=self.user, currency_id=1)
+        self.groceries, self.dining = Category.objects.get(name="Groceries"), Category.objects.get(name="Dining")
+
+    def get_profile(self):
+        return Profile.objects.get(user=self.user)
+
+    def test_history_reloaded_after_write(self):
+        today = datetime.date(2026, 8, 14)
+        Transaction.objects.create(user=self.user, date=today, type_id=TYPE_EXPENSE, category=self.groceries, name="Store", amount=Decimal("10.50"))
+        history = analytics.get_history(self.get_profile())
+        self.assertIs(analytics.get_history(self.get_profile()), history)
+        self.assertEqual(analytics.balance(history), Decimal("-10.50"))
+
+        Transaction.objects.create(user=self.user, date=today, type_id=TYPE_INCOME, category=Category.objects.get(name="Salary"), name="Salary", amount=Decimal("100"))
+        history = analytics.get_history(self.get_profile())
+        self.assertEqual((len(history), analytics.balance(history)), (2, Decimal("89.50")))
+
+    def test_trends(self):
+        today = datetime.date(2026, 8, 14)
+        for days, category, amount in ((0, self.groceries, "30"), (10, self.groceries, "60"), (45, self.dining, "20"), (400, self.dining, "999")):
+            Transaction.objects.create(user=self.user, date=today - datetime.timedelta(days=days), type_id=TYPE_EXPENSE, category=category, name="Entry", amount=Decimal(amount))
+
+        trends = analytics.get_trends(analytics.get_history(self.get_profile()), {self.groceries.pk: "Groceries", self.dining.pk: "Dining"}, today)
+        self.assertEqual(trends["average_daily"], 3.0)
+        self.assertEqual(trends["labels_months"], ["March", "April", "May", "June", "July", "August"])
+        self.assertEqual(trends["categories"], [
+            {"label": "Groceries", "values": [0, 0, 0, 0, 0, Decimal("90.00")]},
+            {"label": "Dining", "values": [0, 0, 0, Decimal("20.00"), 0, 0]},
+        ])
+        self.assertEqual(trends["percentiles"][50], 45.0)
+
+
+class SearchTests(TestCase):
+    """Checks the quick search through the index of the entry names & notes."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def setUp(self):
+        self.user = User.objects.create_user('search')
+        other = User.objects.create_user('other')
+        groceries, salary = Category.objects.get(name="Groceries"), Category.objects.get(name="Salary")
+        self.entries = {
+            name: Transaction.objects.create(user=self.user, type_id=category.type_id, category=category, name=name, amount=Decimal("10"), note=note)
+            for name, category, note in (
+                ("Starbucks coffee", groceries, ""),
+                ("Corner shop", groceries, "Coffee beans & milk"),
+                ("Monthly salary", salary, "September"),
+            )
+        }
+        Transaction.objects.create(user=other, type_id=TYPE_EXPENSE, category=groceries, name="Coffee", amount=Decimal("5"))
+
+    def search(self, query):
+        return set(Transaction.objects.filter(user=self.user).filter(compile_search(query, self.user)).values_list('name', flat=True))
+
+    def test_words(self):
+        self.assertEqual(self.search("coffee"), {"Starbucks coffee", "Corner shop"})
+        self.assertEqual(self.search("STAR"), {"Starbucks coffee"})
+        self.assertEqual(self.search("coffee milk"), {"Corner shop"})
+        self.assertEqual(self.search("sept"), {"Monthly salary"})
+        self.assertEqual(self.search("bucks"), set())
+
+    def test_types_and_categories(self):
+        self.assertEqual(self.search("Income"), {"Monthly salary"})
+        self.assertEqual(self.search("groceries"), {"Starbucks coffee", "Corner shop"})
+
+    def test_index_follows_edits(self):
+        entry = self.entries["Corner shop"]
+        entry.name, entry.note = "Bakery", ""
+        entry.save()
+        self.assertEqual(self.search("coffee"), {"Starbucks coffee"})
+        self.assertEqual(self.search("bakery"), {"Bakery"})
+        pk = entry.pk
+        entry.delete()
+        self.assertFalse(SearchToken.objects.filter(transaction_id=pk).exists())
+
+
+class QueryBudgetTests(TestCase):
+    """Runs the querybudget command, which fails when a URL exceeds its query or row budget."""
+
+    fixtures = ['type', 'category', 'currency']
+
+    def test_urls_within_budget(self):
+        output = io.StringIO()
+        call_command('querybudget', stdout=output)
+        self.assertIn("Every URL is within its query budget.", output.getvalue())
@@ -1,31 +1,118 @@
+import asyncio
 import datetime
+from functools import wraps
 
-from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
+from authenticator.decorators import profile_required
 from authenticator.models import Profile
+from authenticator.versions import get_etag
+from budgeter.cache import get_reference, get_version
 from budgeter.models import Category, Type
-from wallet.forms import TransactionForm
+from wallet import analytics
+from wallet.concurrency import run
+from wallet.forms import ImportForm, TransactionForm
+from wallet.importer import PARSERS, import_entries
 from wallet.models import Transaction
-from wallet.services import finder, get_entries, group_entries
-
-MONTH_INDEX = [
-            "January",
-            "February",
-            "March",
-            "April",
-            "May",
-            "June",
-            "July",
-            "August",
-            "September",
-            "October",
-            "November",
-            "December",
-        ]
+from wallet.rollups import range_totals
+from wallet.services import explain_filters, export_rows, finder, get_cursor, get_filters, paginate_entries, stream_csv, stream_json
+from wallet.stats import STATISTICS_SECTIONS, get_statistics, get_statistics_async, group_days
+
+# Content types & generators of the export formats
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", stream_csv),
+    "json": ("application/json", stream_json),
+}
+
+
+# Conditional GETs
+#
+# The dashboard & its statistics only depend on the user's data, the reference
+# data and the current day (e.g. for the statistics of the current month), so
+# they are answered with a 304 right after the profile lookup when unchanged.
+# The pages are marked no-cache, so that browsers revalidate them on every
+# load rather than reusing them on the strength of their Last-Modified header.
+
+def get_dashboard_etag(request, **kwargs):
+    """Returns the entity tag of the current user's dashboard or statistics."""
+    return get_etag(request, get_version()[0], timezone.localdate())
+
+
+def get_dashboard_modified(request, **kwargs):
+    """Returns the last time the current user's dashboard or statistics changed."""
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(request.profile.data_modified, get_version()[1], today)
+
+
+def get_categories_etag(request):
+    """Returns the entity tag of the categories, as of the reference data version."""
+    return get_version()[0]
+
+
+def get_categories_modified(request):
+    """Returns the last time the reference data changed."""
+    return get_version()[1]
+
+
+def async_revalidated(etag_func, last_modified_func):
+    """
+    Works like cache_control(private=True, no_cache=True) along with
+    condition() for async views, computing the validators in the query pool.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = quote_etag(await run(etag_func, request, *args, **kwargs))
+            last_modified = int((await run(last_modified_func, request, *args, **kwargs)).timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+                response.headers.setdefault("ETag", etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# Loads the data of the views, in the query pool for the async ones
+
+def load_reference_data():
+    """Returns the types and the expenses & income categories."""
+    types = Type.TypeList(Type)
+    categories_expenses, categories_income = Category.CategoryList(Category)
+    return types, categories_expenses, categories_income
+
+
+def load_entries(request, before=None):
+    """Returns the filtered page of entries following the cursor, along with the next cursor."""
+    return paginate_entries(finder(request), before)
+
+
+def load_range_totals(request):
+    """
+    Returns the totals of the user's entries within the date filter, when it
+    is the only filter applied: the running totals cover all the entries of
+    the range, which would not match the entries listed along other filters.
+    """
+    filters = get_filters(request)
+    if filters.date_range is None or set(filters.conditions) != {'input-date'}:
+        return None
+    return range_totals(request.user, *filters.date_range)
+
 
 # Create your views here.
 
@@ -37,185 +124,148 @@ class Viewer(View):
     main forms through multiple screens.
     """
 
-    @login_required 
+    @profile_required
+    @cache_control(private=True, no_cache=True)
+    @condition(etag_func=get_dashboard_etag, last_modified_func=get_dashboard_modified)
     def dashboard(request):
-        """Displays the corresponding entries & statistics for the current user."""
-
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
+        """
+        Displays the corresponding entries for the current user. The page
+        fetches its statistics from the statistics API once painted.
+        """
 
         # Common data
         types = Type.TypeList(Type)
         categories_expenses, categories_income = Category.CategoryList(Category)
 
         # User-specific data
-        profile = Profile.objects.get(user=request.user.id)
-        currency_short, currency_symbol = Profile.ProfileCurrency(profile)
-        entries = get_entries(request)
-        expenses, income = group_entries(entries)
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
 
-        # Filtered entries
+        # Filtered entries, first page only
         query = finder(request)
-        
-        # Computes the user's balance
-        balance_total = 0
-        for entry in expenses:
-            balance_total -= entry.amount
-        for entry in income:
-            balance_total += entry.amount
-
-        # Counts the no. of entries per day & computes the daily expenditure
-        days = list(dict.fromkeys([item.date for item in query]))
-        balance_daily = dict.fromkeys(days, 0)
-        counter_daily = dict.fromkeys(days, 0)
-        for day in days:
-            for entry in query:
-                if entry.date == day:
-                    counter_daily[day] += 1
-                    if entry in expenses:
-                        balance_daily[day] -= round(float(entry.amount), 2)
-                    if entry in income:
-                        balance_daily[day] += round(float(entry.amount), 2)
-        statistics = []
-        for count, total in zip(counter_daily.values(), balance_daily.values()):
-            pair = [count, total]
-            statistics.append(pair)
-        summary_daily = dict(zip(days, statistics))
-
-        # Computes the absolute expenses & income for the current month
-        expenses_current = 0
-        income_current = 0
-
-        day_current = datetime.datetime.now()
-        month_current = day_current.strftime("%B")
-        year_current = datetime.datetime.now().strftime("%Y")
-        year_previous = str(datetime.datetime.now().year - 1)
-
-        for entry in expenses:
-            if Transaction.TransactionMonth(entry) == month_current and Transaction.TransactionYear(entry) == year_current:
-                expenses_current += entry.amount
-        for entry in income:
-            if Transaction.TransactionMonth(entry) == month_current and Transaction.TransactionYear(entry) == year_current:
-                income_current += entry.amount
-
-        # Computes the relative expenses & income for the current month
-        try:
-            expenses_relative = round(expenses_current / (expenses_current + income_current), 2) * 100
-        except ZeroDivisionError:
-            expenses_relative = 0
-        try:
-            income_relative = round(income_current / (expenses_current + income_current), 2) * 100
-        except ZeroDivisionError:
-            income_relative = 0
-
-        # Computes the expenses & income for the previous 6 months
-        months_previous = []
-        month_current_start = day_current.replace(day=1)
-        for _ in range(6):
-            months_previous_start = (month_current_start - datetime.timedelta(days=1)).replace(day=1)
-            month_current_start = months_previous_start
-            months_previous.append(month_current_start.strftime("%B"))
-
-        expenses_previous = dict.fromkeys(months_previous, 0)
-        income_previous = dict.fromkeys(months_previous, 0)
-        
-        # Covers the case when the previous 6 months are in the current year
-        if months_previous == sorted(months_previous, key=MONTH_INDEX.index, reverse=True):  
-            for month in months_previous:
-                for entry in expenses:
-                    if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_current:
-                        expenses_previous[month] += entry.amount
-                for entry in income:
-                    if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_current:
-                        income_previous[month] += entry.amount  
-
-        # Covers the case when in the previous 6 months two years overlap
-        else:
-            for month in months_previous:
-                for entry in expenses:
-                    if month in ["January", "February", "March", "April", "May"]:
-                        if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_current:
-                            expenses_previous[month] += entry.amount
-                    else:
-                        if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_previous:
-                            expenses_previous[month] += entry.amount
-                for entry in income:
-                    if month in ["January", "February", "March", "April", "May"]:
-                        if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_current:
-                            income_previous[month] += entry.amount      
-                    else:
-                        if Transaction.TransactionMonth(entry) == month and Transaction.TransactionYear(entry) == year_previous:
-                            income_previous[month] += entry.amount 
-
-        # Generates the chart data for the current expenses overview
-        labels_expenses_current = [category.name for category in categories_expenses]
-        data_expenses_current = dict.fromkeys(labels_expenses_current, 0)
-        for entry in expenses:
-            if month_current == Transaction.TransactionMonth(entry) and Transaction.TransactionYear(entry) == year_current:
-                # Ignores the category logo
-                category = Transaction.TransactionCategory(entry).replace(" ", "")[1:]
-                data_expenses_current[category] += entry.amount
-        for key, value in dict(data_expenses_current).items():
-            if value == 0:
-                del data_expenses_current[key]
-        labels_expenses_current = list(data_expenses_current.keys())
-        values_expenses_current = list(data_expenses_current.values())
-
-        # Generates the chart data for the previous expenses overview
-        labels_entries_previous = list(income_previous.keys())
-        values_expenses_previous = list(expenses_previous.values())
-        values_income_previous = list(income_previous.values())
-        
+        entries, cursor = paginate_entries(query)
+
+        # Totals of the date filter applied alone, from the running totals of the daily rollups
+        totals_range = load_range_totals(request)
+
         context = {
             "types": types,
             "categories_expenses": categories_expenses,
             "categories_income": categories_income,
             "currency_short": currency_short,
             "currency_symbol": currency_symbol,
-            "entries": query,
-            "balance_total": balance_total,
-            "summary_daily": summary_daily,
-            "month_current": month_current,
-            "expenses_current": expenses_current,
-            "income_current": income_current,
-            "expenses_relative": expenses_relative,
-            "income_relative": income_relative,
-            "expenses_previous": expenses_previous,
-            "income_previous": income_previous,
-            "labels_expenses_current": labels_expenses_current,
-            "values_expenses_current": values_expenses_current,
-            "labels_entries_previous": labels_entries_previous,
-            "values_expenses_previous": values_expenses_previous,
-            "values_income_previous": values_income_previous
+            "month_current": datetime.date.today().strftime("%B"),
+            "entries": entries,
+            "days": group_days(entries),
+            "cursor": cursor,
+            "totals_range": totals_range
         }
 
         return render(request, "home.html", context)
 
 
-    @login_required 
+    @profile_required
+    @async_revalidated(get_dashboard_etag, get_dashboard_modified)
+    async def dashboard_async(request):
+        """
+        Displays the same dashboard as dashboard(), with the queries of the
+        reference data & of the entries running concurrently in the query pool.
+        """
+
+        # Common data, along with the filtered entries, first page only
+        (types, categories_expenses, categories_income), (entries, cursor), totals_range = await asyncio.gather(
+            run(load_reference_data),
+            run(load_entries, request),
+            run(load_range_totals, request),
+        )
+
+        # User-specific data
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
+
+        context = {
+            "types": types,
+            "categories_expenses": categories_expenses,
+            "categories_income": categories_income,
+            "currency_short": currency_short,
+            "currency_symbol": currency_symbol,
+            "month_current": datetime.date.today().strftime("%B"),
+            "entries": entries,
+            "days": group_days(entries),
+            "cursor": cursor,
+            "totals_range": totals_range
+        }
+
+        return await run(render, request, "home.html", context)
+
+
+    @profile_required
+    def loader(request):
+        """Loads the next page of entries for the current user."""
+
+        # User-specific data
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
+
+        # Filtered entries, starting after the cursor
+        query = finder(request)
+        entries, cursor = paginate_entries(query, get_cursor(request))
+
+        context = {
+            "currency_short": currency_short,
+            "days": group_days(entries),
+            "cursor": cursor
+        }
+
+        return render(request, "entries.html", context)
+
+
+    @profile_required
+    async def loader_async(request):
+        """Loads the next page of entries like loader(), querying them in the query pool."""
+
+        # User-specific data
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
+
+        # Filtered entries, starting after the cursor
+        entries, cursor = await run(load_entries, request, get_cursor(request))
+
+        context = {
+            "currency_short": currency_short,
+            "days": group_days(entries),
+            "cursor": cursor
+        }
+
+        return await run(render, request, "entries.html", context)
+
+
+    @profile_required
+    def exporter(request):
+        """Streams the corresponding entries of the current user as a CSV or JSON file."""
+
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest(f"Unsupported export format: {export_format}")
+        content_type, stream = EXPORT_FORMATS[export_format]
+
+        # Filtered entries, streamed without loading them all in memory
+        rows = export_rows(finder(request))
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        filename = f"transactions-{datetime.date.today().isoformat()}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        return response
+
+
+    @profile_required
     def creator(request):
         """Creates a new transaction entry."""
 
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
-
         # User-specific data
-        profile = Profile.objects.get(user=request.user.id)
-        currency_short, currency_symbol = Profile.ProfileCurrency(profile)
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
 
         if request.method == "POST":
-            form = TransactionForm(request.POST)
+            form = TransactionForm(request.POST, user=request.user)
             if form.is_valid():
                 obj = form.save(commit=False)
-                obj.user = User.objects.get(pk=request.user.id)
+                obj.user = request.user
                 obj.save()
                 return redirect('/')
         else:
@@ -230,27 +280,40 @@ class Viewer(View):
         return render(request, "create.html", context)
 
 
-    @login_required 
+    @profile_required
+    def importer(request):
+        """Imports the entries of a CSV or OFX statement in bulk."""
+
+        result = None
+        if request.method == "POST":
+            form = ImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                parse = PARSERS[form.cleaned_data['format']]
+                result = import_entries(request.user, parse(form.cleaned_data['file']))
+        else:
+            form = ImportForm()
+
+        context = {
+            "form": form,
+            "result": result
+        }
+
+        return render(request, "import.html", context)
+
+
+    @profile_required
     def editor(request, pk):
         """Edit an existing transaction entry."""
 
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
-
         # User-specific data
-        profile = Profile.objects.get(user=request.user.id)
-        currency_short, currency_symbol = Profile.ProfileCurrency(profile)
+        currency_short, currency_symbol = Profile.ProfileCurrency(request.profile)
         
         # Pulls details of the active entry
         entry = Transaction.objects.get(id=pk)
 
         form = TransactionForm(instance=entry)
         if request.method == "POST":
-            form = TransactionForm(request.POST, instance=entry)
+            form = TransactionForm(request.POST, instance=entry, user=request.user)
             if form.is_valid():
                 obj = form.save(commit=False)
                 obj.save()
@@ -266,17 +329,10 @@ class Viewer(View):
         return render(request, "edit.html", context)
         
         
-    @login_required 
+    @profile_required
     def eraser(request, pk):
         """Delete an existing transaction entry."""
         
-        # Prevents the user from skipping the initial configuration step.
-        try:
-            if Profile.objects.get(user=request.user.id):
-                pass
-        except ObjectDoesNotExist:
-            return redirect('/configure')
-
         entry = Transaction.objects.get(id=pk)
         if request.method == "POST":
             entry.delete()
@@ -287,12 +343,73 @@ class Viewer(View):
         return render(request, "delete.html", context)
 
 
+# Statistics API
+#
+# Each section of the dashboard statistics (see wallet/stats.py) is served
+# as JSON by its own URL, answered from the statistics cache and revalidated
+# like the dashboard itself. The trends are computed from the per-process
+# NumPy history of the user (see wallet/analytics.py) instead.
+
+@profile_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_dashboard_etag, last_modified_func=get_dashboard_modified)
+def statistics_view(request, section):
+    """Returns a section of the current user's statistics."""
+    if section not in STATISTICS_SECTIONS:
+        raise Http404(f"Unknown statistics: {section}")
+
+    categories_expenses, categories_income = Category.CategoryList(Category)
+    statistics = get_statistics(request.profile, categories_expenses, get_version()[0])
+
+    return JsonResponse({key: statistics[key] for key in STATISTICS_SECTIONS[section]}, encoder=DjangoJSONEncoder)
+
+
+@profile_required
+@async_revalidated(get_dashboard_etag, get_dashboard_modified)
+async def statistics_view_async(request, section):
+    """Returns a section of the statistics like statistics_view(), running their queries concurrently."""
+    if section not in STATISTICS_SECTIONS:
+        raise Http404(f"Unknown statistics: {section}")
+
+    (types, categories_expenses, categories_income), (reference_version, modified) = await asyncio.gather(
+        run(load_reference_data),
+        run(get_version),
+    )
+    statistics = await get_statistics_async(request.profile, categories_expenses, reference_version)
+
+    return JsonResponse({key: statistics[key] for key in STATISTICS_SECTIONS[section]}, encoder=DjangoJSONEncoder)
+
+
+@profile_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_dashboard_etag, last_modified_func=get_dashboard_modified)
+def trends_view(request):
+    """Returns the trends of the current user's expenses, computed from their in-memory history."""
+    category_names = {category.pk: category.name for category in get_reference().categories}
+    trends = analytics.get_trends(analytics.get_history(request.profile), category_names)
+
+    return JsonResponse(trends, encoder=DjangoJSONEncoder)
+
+
+# Finder debugging
+
+@profile_required
+def finder_explain_view(request):
+    """Returns the compiled search & filter criteria, along with the SQL & the query plan of the entry listing."""
+    if not (getattr(settings, 'WALLET_FINDER_DEBUG', False) or request.user.is_staff):
+        raise Http404("Finder debugging is disabled.")
+
+    return JsonResponse(explain_filters(request), encoder=DjangoJSONEncoder)
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=get_categories_etag, last_modified_func=get_categories_modified)
 def categories_view(request):
     """
     Loads the corresponding categories for each type 
     of transaction in the create entry window.
     """
     type_id = request.GET.get('type_id')
-    categories = Category.objects.filter(type_id=type_id).all()
+    categories = get_reference().categories_for(type_id)
 
     return render(request, 'categories.html', {'categories': categories})
\ No newline at end of file